@@ -0,0 +1,95 @@
+# agrupar.py
+
+"""
+Motor de agrupación (group-by) vectorizado para la TablaYT.
+
+Todas las agregaciones de un grupo se calculan en una sola pasada sobre los
+arreglos, sin bucles de Python por fila ni búsquedas del tipo
+"if pl not in playlists":
+  - conteo y suma con np.bincount sobre los códigos de grupo
+  - mínimo y máximo con un ordenamiento estable y np.minimum/maximum.reduceat
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class Grupos:
+    """
+    Resultado de una agrupación. Todos los arreglos están alineados con 'claves':
+    la posición i corresponde al grupo claves[i]. Si se agruparon varias columnas
+    a la vez (valores de forma (n, m)), suma/minimo/maximo tienen forma (grupos, m).
+    """
+    claves: list
+    conteo: np.ndarray
+    suma: np.ndarray
+    minimo: np.ndarray
+    maximo: np.ndarray
+
+    @property
+    def media(self):
+        conteo = np.maximum(self.conteo, 1)
+        if self.suma.ndim == 2:
+            conteo = conteo[:, None]
+        return self.suma / conteo
+
+
+def agrupar(codigos, valores, categorias=None, mascara=None):
+    """
+    Agrupa 'valores' según 'codigos'.
+
+    - codigos   : si se entregan 'categorias', códigos enteros (0..len-1, -1 = sin
+                  grupo), como los de las columnas categóricas de TablaYT; si no, una
+                  columna cualquiera, que se codifica aquí con np.unique
+    - valores   : arreglo numérico alineado con 'codigos', de forma (n,) o (n, m)
+                  para agregar m columnas en la misma pasada
+    - mascara   : filas a considerar (por ejemplo, solo las celdas válidas)
+
+    Los grupos sin filas se omiten del resultado.
+    """
+    codigos = np.asarray(codigos)
+    valores = np.asarray(valores)
+    if categorias is None:
+        categorias, codigos = np.unique(codigos, return_inverse=True)
+        categorias = categorias.tolist()
+
+    # Las filas sin grupo (-1) o fuera de la máscara no participan
+    usar = codigos >= 0
+    if mascara is not None:
+        usar &= mascara
+    codigos = codigos[usar]
+    valores = valores[usar]
+
+    n_grupos = len(categorias)
+    conteo = np.bincount(codigos, minlength=n_grupos)
+    if valores.ndim == 2:
+        suma = np.column_stack([np.bincount(codigos, weights=col, minlength=n_grupos) for col in valores.T])
+    else:
+        suma = np.bincount(codigos, weights=valores, minlength=n_grupos)
+
+    # Mínimo y máximo: ordenar por grupo y reducir cada tramo contiguo
+    minimo = np.full(suma.shape, np.nan)
+    maximo = np.full(suma.shape, np.nan)
+    if len(codigos):
+        orden = np.argsort(codigos, kind="stable")
+        ordenados = valores[orden]
+        presentes = np.flatnonzero(conteo)
+        inicios = np.concatenate(([0], np.cumsum(conteo[presentes])[:-1]))
+        minimo[presentes] = np.minimum.reduceat(ordenados, inicios)
+        maximo[presentes] = np.maximum.reduceat(ordenados, inicios)
+
+    presentes = conteo > 0
+    return Grupos(
+        claves=[c for c, p in zip(categorias, presentes) if p],
+        conteo=conteo[presentes],
+        suma=suma[presentes],
+        minimo=minimo[presentes],
+        maximo=maximo[presentes],
+    )
+
+
+def agrupar_por(tabla, clave, valor, mascara=None):
+    """Agrupa la columna 'valor' de la TablaYT por la columna 'clave'."""
+    return agrupar(tabla[clave], tabla[valor], tabla.categorias.get(clave), mascara)
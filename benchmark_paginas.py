@@ -0,0 +1,414 @@
+# benchmark_paginas.py
+
+"""
+Benchmark de las páginas de los dashboards (main.py y demo_simple.py).
+
+Para cada script y cada tamaño de datos (por defecto 1.000, 100.000 y 1.000.000
+de filas):
+  1) Genera datos sintéticos con el mismo formato que los reales (una exportación
+     YT-STATS para main.py, datos_alumnos.csv / datos_alumnos_faker.csv para
+     demo_simple.py) en una carpeta propia. Los datos se generan con una semilla
+     fija y se reutilizan si la carpeta ya existe.
+  2) Ejecuta el script sin navegador con AppTest de Streamlit, en un proceso
+     aparte (así las cachés y la memoria de un caso no afectan al siguiente),
+     y recorre todas las páginas del menú lateral. Cada caso se ejecuta dos
+     veces, en procesos distintos: una para los tiempos y otra, con tracemalloc
+     (que hace más lentas las ejecuciones), para la memoria. Antes de cada una se
+     borran los snapshots de los datos, así que la primera visita siempre parte
+     igual de fría. Para cada página guarda:
+       - tiempo_frio_s          : primera visita (incluye cálculos que después quedan en caché)
+       - tiempo_s               : mediana de las visitas siguientes
+       - memoria_pico_frio_bytes: pico de memoria de Python y NumPy en la primera visita (tracemalloc)
+       - memoria_pico_bytes     : lo mismo en una visita siguiente
+       - payload_bytes          : bytes de los mensajes que la página envía al navegador
+                                  (tablas y gráficos incluidos), serializados como protobuf
+     La "página" "(carga inicial)" es la primera ejecución del script: lectura de
+     los datos y la página que se muestra por defecto. Cada caso anota además el
+     'modo' de main.py: "memoria" o "lotes" (con archivos grandes main.py pasa
+     solo a modo por lotes, ver lotes.py); con --modo se fija para todos los casos.
+  3) Escribe un reporte JSON. Con --comparar se compara contra un reporte
+     anterior y se listan las regresiones (métricas que empeoraron más que
+     --umbral); en ese caso el programa termina con código 1.
+
+Uso:
+    python benchmark_paginas.py --salida bench_base.json
+    python benchmark_paginas.py --tamanos 1000 100000 --salida bench.json --comparar bench_base.json
+    python benchmark_paginas.py --modo memoria --scripts main.py --salida bench_memoria.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from snapshot import directorio_snapshots
+
+TAMANOS = (1_000, 100_000, 1_000_000)
+REPETICIONES = 3
+SEMILLA = 12345
+
+# Una regresión es una métrica que creció más que este porcentaje...
+UMBRAL_REGRESION = 0.25
+# ...y además más que estos mínimos absolutos (evita alarmas por ruido en casos muy rápidos)
+MINIMOS_REGRESION = {
+    "tiempo_frio_s": 0.05,
+    "tiempo_s": 0.05,
+    "memoria_pico_frio_bytes": 1024 * 1024,
+    "memoria_pico_bytes": 1024 * 1024,
+    "payload_bytes": 1024,
+}
+
+# --modo fija el modo de main.py con su variable DASHBOARD_MEMORIA_MAXIMA_MB
+# (un presupuesto de 0 MB obliga a ir por lotes; uno enorme, a cargar todo en memoria)
+MEMORIA_MAXIMA_MB_POR_MODO = {"memoria": str(1024 * 1024), "lotes": "0"}
+
+# Máximo de segundos que AppTest espera a que termine una ejecución del script
+TIEMPO_MAXIMO_S = 1800
+
+CARGA_INICIAL = "(carga inicial)"
+ARCHIVO_YT = "Usach Premium STATS - YT-STATS.csv"  # el archivo que lee main.py
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- Datos sintéticos ---
+
+CURSOS = ["Cálculo 1", "Cálculo 2", "Física 1", "Física 2", "Álgebra 1", "Álgebra 2",
+          "Python para Ingeniería", "Fundamentos de Economía", "Química General", "Estadística"]
+TEMAS = ["Preparando la PEP 1", "Preparando la PEP 2", "Ejercicios resueltos", "Repaso",
+         "Integrales", "Derivadas", "MRU y MRUA", "Matrices", "Vectores", "Probabilidades"]
+AYUDANTES = ["Rodrigo O.", "Aisaac M.", "Renato Vásquez C.", "Fernando S.", "Benjamín Sepúlveda",
+             "Trinidad Palma", "Byron Caices", "Camila R.", "Josefa T.", "Matías G."]
+NOMBRES = ["Ana", "Juan", "María", "Luis", "Carla", "Pedro", "Josefa", "Diego", "Camila", "Tomás",
+           "Valentina", "Benjamín", "Isidora", "Vicente", "Florencia", "Martín"]
+APELLIDOS = ["Pérez", "Soto", "Ríos", "Díaz", "Ruiz", "González", "Muñoz", "Rojas", "Fuentes",
+             "Vásquez", "Contreras", "Sepúlveda", "Morales", "Araya", "Espinoza", "Núñez"]
+
+ENCABEZADOS_YT = ["videoId", "título", "publicado", "duración", "playlist(s)", "enlace", "categoría ID",
+                  "vistas", "likes", "comentarios", "privacidad", "actualizado", "usuariosUnicos",
+                  "usuariosZoom", "Ayudante"]
+
+
+def _elegir(rng, opciones, n):
+    return np.asarray(opciones, dtype=object)[rng.integers(0, len(opciones), n)]
+
+
+def generar_yt(path, n, semilla=SEMILLA):
+    """Escribe en 'path' una exportación YT-STATS sintética de 'n' videos."""
+    rng = np.random.default_rng(semilla)
+    cursos = _elegir(rng, CURSOS, n)
+    ayudantes = _elegir(rng, AYUDANTES, n)
+    numero = pd.Series(rng.integers(1, 13, n)).astype(str).to_numpy(dtype=object)
+    titulos = cursos + " - Ayudantía " + numero + ": " + _elegir(rng, TEMAS, n) + " [" + ayudantes + "]"
+
+    inicio = np.datetime64("2020-03-01T00:00:00")
+    segundos = rng.integers(0, 5 * 365 * 24 * 3600, n)
+    publicado = pd.Series(inicio + segundos.astype("timedelta64[s]"))
+    duracion = rng.integers(5 * 60, 3 * 3600, n)
+    horas = pd.Series(duracion // 3600).astype(str)
+    minutos = pd.Series(duracion // 60 % 60).astype(str).str.zfill(2)
+    segs = pd.Series(duracion % 60).astype(str).str.zfill(2)
+    # Un 10% de los videos no está en ninguna playlist ("—", como en la exportación real)
+    playlists = np.where(rng.random(n) < 0.1, "—", cursos + " [1-2025]")
+    vistas = rng.lognormal(6.5, 1.0, n).astype(np.int64)
+    ids = pd.Series(np.arange(n)).astype(str).str.zfill(10).radd("V").to_numpy()
+
+    tabla = pd.DataFrame({
+        "videoId": ids,
+        "título": titulos,
+        "publicado": publicado.dt.strftime("%d/%m/%Y %H:%M:%S"),
+        "duración": (horas + ":" + minutos + ":" + segs).to_numpy(),
+        "playlist(s)": playlists,
+        "enlace": "https://youtu.be/" + ids,
+        "categoría ID": 24,
+        "vistas": vistas,
+        "likes": (vistas * rng.uniform(0.005, 0.04, n)).astype(np.int64),
+        "comentarios": rng.poisson(0.5, n),
+        "privacidad": np.where(rng.random(n) < 0.9, "public", "unlisted"),
+        "actualizado": "28/05/2025 22:46:14",
+        "usuariosUnicos": "",
+        "usuariosZoom": "",
+        "Ayudante": ayudantes,
+    }, columns=ENCABEZADOS_YT)
+    tabla.to_csv(path, index=False)
+
+
+def generar_alumnos(path, n, semilla=SEMILLA):
+    """Escribe en 'path' una lista sintética de 'n' alumnos (nombre,pep1,pep2,control1,control2)."""
+    rng = np.random.default_rng(semilla)
+    nombres = _elegir(rng, NOMBRES, n) + " " + _elegir(rng, APELLIDOS, n) + " " + _elegir(rng, APELLIDOS, n)
+    notas = rng.integers(40, 101, size=(n, 4))
+    tabla = pd.DataFrame(notas, columns=["pep1", "pep2", "control1", "control2"])
+    tabla.insert(0, "nombre", nombres)
+    tabla.to_csv(path, index=False)
+
+
+def _datos_main(directorio, n):
+    generar_yt(os.path.join(directorio, ARCHIVO_YT), n)
+
+
+def _datos_demo_simple(directorio, n):
+    # demo_simple.py ofrece los dos archivos; ambos tienen el mismo tamaño en el benchmark
+    generar_alumnos(os.path.join(directorio, "datos_alumnos.csv"), n)
+    generar_alumnos(os.path.join(directorio, "datos_alumnos_faker.csv"), n, SEMILLA + 1)
+
+
+# Script -> función que genera sus datos en una carpeta
+SCRIPTS = {"main.py": _datos_main, "demo_simple.py": _datos_demo_simple}
+
+
+def preparar_directorio(base, script, n):
+    """Carpeta con los datos de 'script' para 'n' filas (se generan solo si no existen)."""
+    directorio = os.path.join(base, os.path.splitext(script)[0] + "-" + str(n))
+    if not os.path.isdir(directorio):
+        temporal = directorio + ".generando"
+        os.makedirs(temporal, exist_ok=True)
+        SCRIPTS[script](temporal, n)
+        os.replace(temporal, directorio)
+    # Los scripts buscan el logo en ./images
+    imagenes = os.path.join(directorio, "images")
+    if not os.path.exists(imagenes):
+        os.symlink(os.path.join(DIRECTORIO_REPO, "images"), imagenes)
+    return directorio
+
+
+# --- Medición (dentro del proceso hijo) ---
+
+def payload_bytes(nodo):
+    """Suma de los bytes serializados (protobuf) de todos los elementos bajo 'nodo' (app.main, app.sidebar)."""
+    hijos = getattr(nodo, "children", None)
+    if hijos is not None:
+        return sum(payload_bytes(hijo) for hijo in hijos.values())
+    proto = getattr(nodo, "proto", None)
+    return proto.ByteSize() if proto is not None else 0
+
+
+def _ejecutar(app):
+    inicio = time.perf_counter()
+    app.run()
+    segundos = time.perf_counter() - inicio
+    if app.exception:
+        raise RuntimeError(str(app.exception[0].value))
+    return segundos
+
+
+def _pico_memoria(app):
+    tracemalloc.start()
+    try:
+        _ejecutar(app)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _medir_pagina(app, repeticiones, memoria):
+    """
+    Visita la página actual de 'app' una vez en frío y después 'repeticiones'
+    veces más. Con memoria=True se miden los picos de memoria (de la primera
+    visita y de una siguiente); si no, los tiempos, el payload y el modo.
+    """
+    if memoria:
+        return {"memoria_pico_frio_bytes": _pico_memoria(app), "memoria_pico_bytes": _pico_memoria(app)}
+    frio = _ejecutar(app)
+    tiempos = [_ejecutar(app) for _ in range(repeticiones)]
+    return {
+        "tiempo_frio_s": frio,
+        "tiempo_s": statistics.median(tiempos),
+        "payload_bytes": payload_bytes(app.main) + payload_bytes(app.sidebar),
+    }
+
+
+def _modo(script, app):
+    # main.py avisa con un st.info cuando procesa el archivo por lotes
+    if script != "main.py":
+        return None
+    for aviso in app.info:
+        if "por lotes" in aviso.value:
+            return "lotes"
+    return "memoria"
+
+
+def medir_script(script, directorio, repeticiones=REPETICIONES, memoria=False):
+    """
+    Recorre todas las páginas de 'script' con los datos de 'directorio' y
+    devuelve (modo, lista de diccionarios, uno por página). Ver _medir_pagina y
+    el docstring del módulo.
+    """
+    # Los imports de Streamlit van aquí: el proceso principal no los necesita
+    import logging
+    from streamlit.testing.v1 import AppTest
+
+    logging.disable(logging.WARNING)
+    os.chdir(directorio)
+    sys.path.insert(0, DIRECTORIO_REPO)
+    app = AppTest.from_file(os.path.join(DIRECTORIO_REPO, script), default_timeout=TIEMPO_MAXIMO_S)
+
+    resultados = [dict(pagina=CARGA_INICIAL, **_medir_pagina(app, repeticiones, memoria))]
+    modo = _modo(script, app)
+    # La primera radio de la barra lateral es el menú de páginas en ambos scripts
+    for pagina in app.sidebar.radio[0].options:
+        app.sidebar.radio[0].set_value(pagina)
+        resultados.append(dict(pagina=pagina, **_medir_pagina(app, repeticiones, memoria)))
+    return modo, resultados
+
+
+# --- Orquestación (proceso principal) ---
+
+def _ejecutar_hijo(script, directorio, repeticiones, memoria, modo):
+    """Corre medir_script en un proceso aparte; devuelve su resultado o lanza RuntimeError."""
+    # Cada pasada parte sin snapshots: la primera visita es igual de fría en todas
+    shutil.rmtree(directorio_snapshots(os.path.join(directorio, ARCHIVO_YT)), ignore_errors=True)
+    comando = [sys.executable, os.path.abspath(__file__), "--medir", script,
+               "--directorio", directorio, "--repeticiones", str(repeticiones)]
+    if memoria:
+        comando.append("--memoria")
+    entorno = dict(os.environ)
+    if modo is not None:
+        entorno["DASHBOARD_MEMORIA_MAXIMA_MB"] = MEMORIA_MAXIMA_MB_POR_MODO[modo]
+    proceso = subprocess.run(comando, capture_output=True, text=True, env=entorno)
+    if proceso.returncode != 0:
+        raise RuntimeError((proceso.stderr.strip().splitlines() or ["código " + str(proceso.returncode)])[-1])
+    # El hijo escribe el resultado como JSON en la última línea de su salida
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def medir_caso(script, n, base, repeticiones=REPETICIONES, modo=None):
+    """
+    Mide un script con 'n' filas (una pasada de tiempos y una de memoria, cada
+    una en un proceso aparte); devuelve las filas del reporte. 'modo' fija el
+    modo de main.py ("memoria" o "lotes"); None lo deja elegir a main.py.
+    """
+    directorio = preparar_directorio(base, script, n)
+    caso = {"script": script, "filas": n}
+    try:
+        tiempos = _ejecutar_hijo(script, directorio, repeticiones, False, modo)
+        memoria = _ejecutar_hijo(script, directorio, repeticiones, True, modo)
+    except RuntimeError as error:
+        return [dict(caso, pagina=None, error=str(error))]
+    filas = []
+    for pagina, picos in zip(tiempos["paginas"], memoria["paginas"]):
+        fila = dict(caso, modo=tiempos["modo"], memoria_proceso_max_bytes=tiempos["memoria_proceso_max_bytes"])
+        fila.update(pagina)
+        fila.update(picos)  # las dos pasadas recorren las mismas páginas en el mismo orden
+        filas.append(fila)
+    return filas
+
+
+def versiones():
+    import pyarrow
+    import streamlit
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "streamlit": streamlit.__version__, "pyarrow": pyarrow.__version__}
+
+
+def ejecutar_benchmark(scripts, tamanos, base, repeticiones=REPETICIONES, modo=None):
+    """Mide todos los casos y devuelve el reporte (un diccionario listo para json.dump)."""
+    casos = []
+    for n in tamanos:
+        for script in scripts:
+            print("Midiendo " + script + " con " + str(n) + " filas...", flush=True)
+            casos.extend(medir_caso(script, n, base, repeticiones, modo))
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versiones": versiones(),
+        "repeticiones": repeticiones,
+        "modo": modo,
+        "casos": casos,
+    }
+
+
+def comparar(anterior, actual, umbral=UMBRAL_REGRESION):
+    """
+    Compara dos reportes caso por caso (script, filas, página) y devuelve la lista
+    de regresiones: (clave, métrica, valor anterior, valor actual). Si un caso de
+    main.py cambió de modo (memoria / lotes) sus métricas no son comparables: se
+    informa el cambio de "modo" en vez de compararlas.
+    """
+    previos = {}
+    for caso in anterior["casos"]:
+        previos[(caso["script"], caso["filas"], caso["pagina"])] = caso
+    regresiones = []
+    for caso in actual["casos"]:
+        clave = (caso["script"], caso["filas"], caso["pagina"])
+        previo = previos.get(clave)
+        if previo is None or "error" in previo:
+            continue
+        if "error" in caso:
+            regresiones.append((clave, "error", None, caso["error"]))
+            continue
+        if "modo" in previo and previo["modo"] != caso.get("modo"):
+            regresiones.append((clave, "modo", previo.get("modo"), caso.get("modo")))
+            continue
+        for metrica, minimo in MINIMOS_REGRESION.items():
+            if metrica not in previo:
+                continue  # reporte anterior sin esa métrica
+            antes, ahora = previo[metrica], caso[metrica]
+            if ahora > antes * (1 + umbral) and ahora - antes > minimo:
+                regresiones.append((clave, metrica, antes, ahora))
+    return regresiones
+
+
+def imprimir_reporte(reporte):
+    tabla = pd.DataFrame(reporte["casos"])
+    columnas = [c for c in ["script", "filas", "modo", "pagina", "tiempo_frio_s", "tiempo_s",
+                            "memoria_pico_frio_bytes", "memoria_pico_bytes", "payload_bytes", "error"]
+                if c in tabla.columns]
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(tabla[columnas].to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las páginas de main.py y demo_simple.py.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS), help="filas de cada conjunto de datos")
+    parser.add_argument("--scripts", nargs="+", default=list(SCRIPTS), choices=list(SCRIPTS), help="scripts a medir")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES, help="visitas medidas por página")
+    parser.add_argument("--datos", help="carpeta para los datos sintéticos (se reutilizan entre corridas)")
+    parser.add_argument("--salida", default="bench.json", help="reporte JSON de salida")
+    parser.add_argument("--comparar", help="reporte JSON anterior contra el que comparar")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="aumento relativo que cuenta como regresión")
+    parser.add_argument("--modo", choices=list(MEMORIA_MAXIMA_MB_POR_MODO),
+                        help="fijar el modo de main.py (por defecto lo elige main.py según el tamaño del archivo)")
+    # Uso interno: medir un solo script en este proceso (lo llama medir_caso)
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    parser.add_argument("--directorio", help=argparse.SUPPRESS)
+    parser.add_argument("--memoria", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        modo, paginas = medir_script(args.medir, args.directorio, args.repeticiones, args.memoria)
+        import resource
+        # ru_maxrss está en KB en Linux
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        print(json.dumps({"modo": modo, "paginas": paginas, "memoria_proceso_max_bytes": maximo}))
+        sys.exit(0)
+
+    base = args.datos or tempfile.mkdtemp(prefix="bench-datos-")
+    reporte = ejecutar_benchmark(args.scripts, args.tamanos, base, args.repeticiones, args.modo)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    imprimir_reporte(reporte)
+    print("\nReporte guardado en '" + args.salida + "'")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        regresiones = comparar(anterior, reporte, args.umbral)
+        if regresiones:
+            print("\n===== Regresiones respecto de '" + args.comparar + "' =====")
+            for (script, filas, pagina), metrica, antes, ahora in regresiones:
+                print(script + " | " + str(filas) + " filas | " + str(pagina) + " | "
+                      + metrica + ": " + str(antes) + " -> " + str(ahora))
+            sys.exit(1)
+        print("\nSin regresiones respecto de '" + args.comparar + "'")
@@ -0,0 +1,182 @@
+# bitmaps.py
+
+"""
+Índices de mapas de bits (bitmaps) sobre columnas categóricas de la TablaYT.
+
+Para cada valor distinto de una columna (cada playlist, cada ayudante, ...) se
+guarda un bitmap: un bit por fila, 1 si la fila tiene ese valor. Los bits se
+empaquetan en palabras de 64 bits (np.uint64), así que combinar filtros con
+AND/OR es una operación de NumPy sobre n/64 palabras, y contar las filas que
+cumplen el filtro es un popcount (np.bitwise_count) sobre esas mismas palabras.
+
+Las columnas categóricas se indexan directamente desde sus códigos, sin
+decodificar el texto de cada fila, y todos los bits se encienden con un solo
+ordenamiento (ver _encender). Cuando la ingesta agrega o reemplaza filas,
+extender_indices_bitmap parte de los índices anteriores y procesa solo esas filas.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Columnas por las que se puede filtrar el dashboard
+COLUMNAS_FILTRO = ("playlist(s)", "Ayudante", "privacidad", "categoría ID")
+
+# Cómo se muestra el valor de las celdas vacías
+VACIO = "(vacío)"
+
+
+def empaquetar(mascara):
+    """Convierte una máscara booleana de n filas en un bitmap de ceil(n / 64) palabras uint64."""
+    bytes_ = np.packbits(mascara, bitorder="little")
+    relleno = (-len(bytes_)) % 8
+    if relleno:
+        bytes_ = np.concatenate((bytes_, np.zeros(relleno, dtype=np.uint8)))
+    return bytes_.view(np.uint64)
+
+
+def desempaquetar(bits, n):
+    """Bitmap -> máscara booleana de n filas."""
+    return np.unpackbits(bits.view(np.uint8), count=n, bitorder="little").astype(bool)
+
+
+def contar(bits):
+    """Cantidad de filas marcadas en un bitmap (popcount)."""
+    return int(np.bitwise_count(bits).sum())
+
+
+@dataclass
+class IndiceBitmap:
+    """
+    - columna: nombre de la columna indexada
+    - valores: valores distintos, ordenados (el texto vacío queda como "(vacío)")
+    - bits   : (valores x palabras) un bitmap por valor
+    - n      : cantidad de filas de la tabla
+    """
+    columna: str
+    valores: list
+    bits: np.ndarray
+    n: int
+
+    def bitmap(self, elegidos):
+        """OR de los bitmaps de los valores 'elegidos' (las filas con cualquiera de ellos)."""
+        posiciones = np.searchsorted(self.valores, elegidos)
+        return np.bitwise_or.reduce(self.bits[posiciones], axis=0)
+
+
+def _palabras(n):
+    return -(-n // 64)
+
+
+def _encender(bits, posiciones, filas):
+    """Enciende en 'bits' el bit de cada una de las 'filas' en el bitmap de su valor ('posiciones')."""
+    if len(filas) == 0:
+        return
+    # Se ordena por (valor, palabra): las filas que caen en la misma palabra del mismo
+    # valor encienden bits distintos, así que sumarlas (np.add.reduceat) es lo mismo
+    # que hacer OR, y cada palabra se escribe una sola vez
+    clave = posiciones.astype(np.int64) * bits.shape[1] + filas // 64
+    orden = np.argsort(clave, kind="stable")
+    clave = clave[orden]
+    unos = np.left_shift(np.uint64(1), (filas[orden] % 64).astype(np.uint64))
+    inicios = np.flatnonzero(np.concatenate(([True], clave[1:] != clave[:-1])))
+    planos = bits.reshape(-1)
+    planos[clave[inicios]] |= np.add.reduceat(unos, inicios)
+
+
+def _textos(tabla, columna, filas):
+    """Valores de texto de las 'filas' de una columna, con las celdas vacías como VACIO."""
+    if columna in tabla.categorias:
+        # El código -1 (vacío) apunta al VACIO agregado al final
+        categorias = np.array(list(tabla.categorias[columna]) + [VACIO], dtype=object)
+        return categorias[tabla[columna][filas]]
+    textos = np.asarray(tabla[columna][filas], dtype=object)
+    return np.where(textos == "", VACIO, textos)
+
+
+def indice_bitmap(tabla, columna):
+    """Construye el IndiceBitmap de una columna (categórica o de texto) de la tabla."""
+    n = len(tabla)
+    if columna in tabla.categorias:
+        textos = list(tabla.categorias[columna]) + [VACIO]
+        codigos = tabla[columna].astype(np.int64)
+        codigos = np.where(codigos < 0, len(textos) - 1, codigos)
+    else:
+        codigos, textos = pd.factorize(np.asarray(tabla[columna].tolist(), dtype=object))
+        textos = [VACIO if t == "" else t for t in textos]
+
+    # Solo los valores que aparecen en alguna fila, en orden alfabético
+    presentes = np.bincount(codigos, minlength=len(textos)) > 0
+    textos = np.asarray(textos, dtype=str)
+    valores = np.unique(textos[presentes])
+    posicion = np.zeros(len(textos), dtype=np.int64)
+    posicion[presentes] = np.searchsorted(valores, textos[presentes])
+
+    bits = np.zeros((len(valores), _palabras(n)), dtype=np.uint64)
+    _encender(bits, posicion[codigos], np.arange(n))
+    return IndiceBitmap(columna=columna, valores=valores.tolist(), bits=bits, n=n)
+
+
+def extender_indice_bitmap(indice, tabla, filas):
+    """
+    IndiceBitmap de 'tabla' a partir del 'indice' de una versión anterior de los
+    mismos datos, donde 'filas' son las filas agregadas o reemplazadas desde
+    entonces. 'indice' no se modifica.
+    """
+    n = len(tabla)
+    nuevos = _textos(tabla, indice.columna, filas).astype(str)
+    valores = np.union1d(np.asarray(indice.valores, dtype=str), nuevos)
+
+    bits = np.zeros((len(valores), _palabras(n)), dtype=np.uint64)
+    bits[np.searchsorted(valores, indice.valores), :indice.bits.shape[1]] = indice.bits
+    # Las filas reemplazadas se apagan en todos los valores y se encienden en el nuevo
+    reemplazadas = filas[filas < indice.n]
+    if len(reemplazadas):
+        mascara = np.zeros(n, dtype=bool)
+        mascara[reemplazadas] = True
+        bits &= ~empaquetar(mascara)
+    _encender(bits, np.searchsorted(valores, nuevos), filas)
+
+    # Un valor que ya no tiene filas deja de ofrecerse como filtro
+    presentes = np.bitwise_or.reduce(bits, axis=1) != 0
+    return IndiceBitmap(columna=indice.columna, valores=valores[presentes].tolist(), bits=bits[presentes], n=n)
+
+
+def indices_bitmap(tabla, columnas=COLUMNAS_FILTRO):
+    """Diccionario columna -> IndiceBitmap para las columnas de filtro presentes en la tabla."""
+    indices = {}
+    for columna in columnas:
+        if columna in tabla.columnas:
+            indices[columna] = indice_bitmap(tabla, columna)
+    return indices
+
+
+def extender_indices_bitmap(indices, tabla, filas):
+    """Como indices_bitmap(), extendiendo los 'indices' de una versión anterior (ver extender_indice_bitmap)."""
+    extendidos = {}
+    for columna, indice in indices.items():
+        extendidos[columna] = extender_indice_bitmap(indice, tabla, filas)
+    return extendidos
+
+
+def filtrar(indices, seleccion, modo="Y"):
+    """
+    Combina los filtros elegidos y devuelve el bitmap resultante, o None si no hay
+    ningún filtro activo.
+    - seleccion: columna -> lista de valores elegidos (dentro de una columna se
+                 combinan con O: "playlist A o playlist B")
+    - modo     : "Y" exige cumplir todas las columnas filtradas; "O", alguna de ellas
+    """
+    resultado = None
+    for columna, elegidos in seleccion.items():
+        if not elegidos:
+            continue
+        bits = indices[columna].bitmap(elegidos)
+        if resultado is None:
+            resultado = bits.copy()
+        elif modo == "Y":
+            np.bitwise_and(resultado, bits, out=resultado)
+        else:
+            np.bitwise_or(resultado, bits, out=resultado)
+    return resultado
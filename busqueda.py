@@ -0,0 +1,174 @@
+# busqueda.py
+
+"""
+Búsqueda de videos por título con un índice invertido.
+
+El índice se arma normalizando cada título (minúsculas y sin tildes, así
+"Física" y "fisica" son lo mismo), separándolo en palabras y guardando, para
+cada palabra distinta, la lista de filas donde aparece. Las palabras quedan
+ordenadas alfabéticamente y sus listas de filas una detrás de otra en un solo
+arreglo, de modo que todas las palabras que empiezan con un prefijo ("ayud" ->
+"ayudante", "ayudantia") forman un tramo contiguo que se encuentra con
+búsqueda binaria.
+
+Los títulos se repiten mucho (una misma ayudantía en varias playlists), así que
+cada título distinto se normaliza y se separa en palabras una sola vez, y todos
+juntos en una sola llamada (normalizar_textos). Cuando la ingesta agrega o
+reemplaza filas, extender_indice_titulos parte del índice anterior: quita las
+filas que cambiaron, procesa solo sus títulos nuevos y mezcla ambas partes, en
+vez de volver a procesar todos los títulos.
+
+Una consulta con varias palabras devuelve los videos que tienen todas ellas
+(como prefijo de alguna palabra del título), ordenados por vistas.
+"""
+
+import itertools
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+_PATRON_PALABRA = re.compile(r"\w+")
+
+# Separa los títulos al normalizarlos todos juntos (no es una letra ni aparece en un título)
+_SEPARADOR = "\x00"
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ni diéresis: "Ayudantía Pingüino" -> "ayudantia pinguino"."""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def normalizar_textos(textos):
+    """normalizar() de una lista de textos, con una sola llamada a casefold, normalize y translate."""
+    if not textos:
+        return []
+    texto = unicodedata.normalize("NFKD", _SEPARADOR.join(textos).casefold())
+    # Solo se revisan los caracteres distintos del texto, no cada carácter
+    tildes = {ord(c): None for c in set(texto) if unicodedata.combining(c)}
+    return texto.translate(tildes).split(_SEPARADOR)
+
+
+def palabras(texto):
+    """Palabras normalizadas de un texto."""
+    return _PATRON_PALABRA.findall(normalizar(texto))
+
+
+@dataclass
+class IndiceTitulos:
+    """
+    Índice invertido de títulos.
+    - vocabulario: palabras distintas, ordenadas (arreglo de str)
+    - inicios    : inicios[k]:inicios[k + 1] es el tramo de 'filas' de la palabra k
+    - filas      : números de fila de todas las palabras, concatenados
+    - vistas     : vistas de cada fila, para ordenar los resultados
+    """
+    vocabulario: np.ndarray
+    inicios: np.ndarray
+    filas: np.ndarray
+    vistas: np.ndarray
+
+    def filas_con_prefijo(self, prefijo):
+        """Filas (ordenadas, sin repetir) con alguna palabra que empieza con 'prefijo' ya normalizado."""
+        i = int(np.searchsorted(self.vocabulario, prefijo, side="left"))
+        # Toda palabra con ese prefijo es menor que prefijo + el mayor carácter posible
+        j = int(np.searchsorted(self.vocabulario, prefijo + "\U0010ffff", side="left"))
+        if i == j:
+            return np.zeros(0, dtype=np.int64)
+        tramo = self.filas[self.inicios[i]:self.inicios[j]]
+        if j - i == 1:
+            return tramo
+        if len(tramo) * 64 < len(self.vistas):
+            return np.unique(tramo)
+        # Tramos grandes (prefijos cortos): marcar las filas en una máscara es más
+        # barato que ordenar el tramo
+        mascara = np.zeros(len(self.vistas), dtype=bool)
+        mascara[tramo] = True
+        return np.flatnonzero(mascara)
+
+    def buscar(self, consulta, limite=None):
+        """
+        Filas cuyos títulos contienen todas las palabras de 'consulta' (cada una
+        como prefijo de alguna palabra), ordenadas por vistas de mayor a menor.
+        Una consulta sin palabras devuelve un arreglo vacío.
+        """
+        terminos = palabras(consulta)
+        if not terminos:
+            return np.zeros(0, dtype=np.int64)
+        # Empezamos por el término con menos filas para que las intersecciones sean pequeñas
+        candidatos = sorted((self.filas_con_prefijo(t) for t in set(terminos)), key=len)
+        resultado = candidatos[0]
+        for otras in candidatos[1:]:
+            if len(resultado) == 0:
+                break
+            resultado = np.intersect1d(resultado, otras, assume_unique=True)
+        resultado = resultado[np.argsort(-self.vistas[resultado], kind="stable")]
+        return resultado if limite is None else resultado[:limite]
+
+
+def _pares(titulos, filas):
+    """
+    Pares (palabra, fila) sin repetir de los 'titulos' (lista, arreglo o
+    ColumnaTexto) de las 'filas' indicadas. Devuelve (vocabulario, palabra de
+    cada par como posición en el vocabulario, fila de cada par).
+    """
+    titulos = titulos if isinstance(titulos, list) else titulos.tolist()
+    codigos, distintos = pd.factorize(np.asarray(titulos, dtype=object))
+    por_titulo = [set(_PATRON_PALABRA.findall(t)) for t in normalizar_textos(list(distintos))]
+    vocabulario, palabra_de_par = np.unique(
+        np.array(list(itertools.chain.from_iterable(por_titulo)), dtype=str), return_inverse=True
+    )
+    titulo_de_par = np.repeat(np.arange(len(por_titulo)), [len(p) for p in por_titulo])
+
+    # Filas de cada título distinto, contiguas en 'orden' a partir de inicio_titulo
+    orden = np.argsort(codigos, kind="stable")
+    filas_titulo = np.bincount(codigos, minlength=len(por_titulo))
+    inicio_titulo = np.cumsum(filas_titulo) - filas_titulo
+
+    # Cada par (palabra, título) se repite una vez por cada fila con ese título
+    repeticiones = filas_titulo[titulo_de_par]
+    primero = np.cumsum(repeticiones) - repeticiones
+    desplazamiento = np.arange(int(repeticiones.sum())) - np.repeat(primero, repeticiones)
+    pares_fila = np.asarray(filas)[orden[np.repeat(inicio_titulo[titulo_de_par], repeticiones) + desplazamiento]]
+    return vocabulario, np.repeat(palabra_de_par, repeticiones), pares_fila
+
+
+def _armar(vocabulario, pares_palabra, pares_fila, vistas):
+    # Orden por (palabra, fila): cada palabra queda con sus filas contiguas y crecientes
+    vistas = np.asarray(vistas)
+    n = max(len(vistas), 1)
+    clave = np.sort(pares_palabra.astype(np.int64) * n + pares_fila)
+    inicios = np.searchsorted(clave, np.arange(len(vocabulario) + 1, dtype=np.int64) * n)
+    return IndiceTitulos(vocabulario=vocabulario, inicios=inicios, filas=clave % n, vistas=vistas)
+
+
+def indice_titulos(tabla):
+    """IndiceTitulos de la columna "título" de una TablaYT, rankeado por "vistas"."""
+    vocabulario, pares_palabra, pares_fila = _pares(tabla["título"], np.arange(len(tabla)))
+    return _armar(vocabulario, pares_palabra, pares_fila, tabla["vistas"])
+
+
+def extender_indice_titulos(indice, tabla, filas):
+    """
+    IndiceTitulos de 'tabla' a partir del 'indice' de una versión anterior de
+    los mismos datos, donde 'filas' son las filas agregadas o reemplazadas desde
+    entonces. 'indice' no se modifica.
+    """
+    # Se quitan las filas que cambiaron; las demás conservan sus palabras
+    cambiada = np.zeros(len(tabla), dtype=bool)
+    cambiada[filas] = True
+    se_quedan = ~cambiada[indice.filas]
+    palabra_vieja = np.repeat(np.arange(len(indice.vocabulario)), np.diff(indice.inicios))[se_quedan]
+
+    nuevo, palabra_nueva, fila_nueva = _pares(tabla["título"][filas], filas)
+    # Las palabras que se quedaron sin filas siguen en el vocabulario: sus tramos quedan vacíos
+    vocabulario = np.union1d(indice.vocabulario, nuevo)
+    pares_palabra = np.concatenate((
+        np.searchsorted(vocabulario, indice.vocabulario)[palabra_vieja],
+        np.searchsorted(vocabulario, nuevo)[palabra_nueva],
+    ))
+    pares_fila = np.concatenate((indice.filas[se_quedan], fila_nueva))
+    return _armar(vocabulario, pares_palabra, pares_fila, tabla["vistas"])
@@ -0,0 +1,294 @@
+# cache_datos.py
+
+"""
+Caché en memoria para los datos y agregados del dashboard, con política de
+desalojo configurable (a diferencia de st.cache_data, que guarda todo para
+siempre y entrega una copia en cada acierto).
+
+- CacheDatos: caché LRU con tiempo de vida (TTL), máximo de entradas y un
+  presupuesto de bytes. Por defecto entrega el mismo objeto a todas las
+  sesiones, con sus arreglos de NumPy marcados como de solo lectura; con
+  compartido=False entrega una copia profunda en cada acierto.
+- Contadores: aciertos, fallos, desalojos (por LRU/bytes), expirados (por TTL)
+  y rechazados (objetos más grandes que el presupuesto completo), para dimensionar
+  la caché en un despliegue con muchos usuarios.
+- cache_global(): una instancia por proceso, configurada con variables de entorno:
+    DASHBOARD_CACHE_MAX_MB        presupuesto de bytes (por defecto, el presupuesto de
+                                  memoria de los datos más 512 MB para los agregados)
+    DASHBOARD_CACHE_TTL_S         segundos de vida de cada entrada (por defecto sin límite)
+    DASHBOARD_CACHE_MAX_ENTRADAS  máximo de entradas (por defecto sin límite)
+"""
+
+import copy
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+# Presupuesto de memoria para los datos (MB); se puede cambiar con una variable de entorno.
+# main.py lo usa para decidir si un archivo se carga entero o por lotes, y la caché
+# global no puede ser más chica: los datos cargados viven en ella
+MEMORIA_MAXIMA_MB = int(os.environ.get("DASHBOARD_MEMORIA_MAXIMA_MB", "1024"))
+
+
+def tamano_en_bytes(objeto, vistos=None):
+    """
+    Estimación de la memoria que ocupa 'objeto', recorriendo listas, diccionarios
+    y atributos. Los arreglos con mmap no cuentan: sus páginas son del sistema
+    operativo y se comparten entre procesos. Los objetos que llevan la cuenta de
+    su propia memoria (cuenta_sus_bytes = True, como IngestaIncremental) la
+    informan en 'nbytes' y no se recorren.
+    """
+    if vistos is None:
+        vistos = set()
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+
+    if getattr(objeto, "cuenta_sus_bytes", False):
+        return objeto.nbytes
+    if isinstance(objeto, np.memmap):
+        return 0
+    if isinstance(objeto, np.ndarray):
+        if objeto.dtype == object:
+            return objeto.nbytes + sum(tamano_en_bytes(x, vistos) for x in objeto.ravel().tolist())
+        # Las vistas no tienen memoria propia: se cuenta el arreglo base una sola vez
+        return tamano_en_bytes(objeto.base, vistos) if objeto.base is not None else objeto.nbytes
+    total = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        for clave, valor in objeto.items():
+            total += tamano_en_bytes(clave, vistos) + tamano_en_bytes(valor, vistos)
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        for valor in objeto:
+            total += tamano_en_bytes(valor, vistos)
+    elif hasattr(objeto, "__dict__") and not isinstance(objeto, type):
+        total += tamano_en_bytes(vars(objeto), vistos)
+    return total
+
+
+def solo_lectura(objeto, vistos=None):
+    """Marca como no modificables todos los arreglos de NumPy alcanzables desde 'objeto'."""
+    if vistos is None:
+        vistos = set()
+    if id(objeto) in vistos:
+        return objeto
+    vistos.add(id(objeto))
+
+    if isinstance(objeto, np.ndarray):
+        objeto.flags.writeable = False
+    elif isinstance(objeto, dict):
+        for valor in objeto.values():
+            solo_lectura(valor, vistos)
+    elif isinstance(objeto, (list, tuple)):
+        for valor in objeto:
+            solo_lectura(valor, vistos)
+    elif hasattr(objeto, "__dict__") and not isinstance(objeto, type):
+        solo_lectura(vars(objeto), vistos)
+    return objeto
+
+
+@dataclass
+class _Entrada:
+    valor: object
+    bytes: int
+    creada: float
+    compartido: bool
+
+
+class CacheDatos:
+    """
+    Caché LRU con TTL y presupuesto de bytes. Segura entre hilos (Streamlit
+    atiende cada sesión en un hilo distinto).
+    - max_entradas: None = sin límite
+    - ttl         : segundos de vida de cada entrada; None = sin límite
+    - max_bytes   : presupuesto total; al superarlo se desalojan las entradas
+                    usadas hace más tiempo. None = sin límite
+    - compartido  : True entrega el mismo objeto (con arreglos de solo lectura);
+                    False entrega una copia en cada acierto
+
+    Para objetos con estado que deben seguir modificándose (por ejemplo, una
+    IngestaIncremental) se usa compartido=True y proteger=False al guardarlos.
+    """
+
+    def __init__(self, max_entradas=None, ttl=None, max_bytes=None, compartido=True, reloj=time.monotonic):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compartido = compartido
+        self._reloj = reloj
+        self._entradas = OrderedDict()  # de la usada hace más tiempo a la más reciente
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expirados = 0
+        self.rechazados = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _vigente(self, clave):
+        # Devuelve la entrada si existe y no expiró (la expirada se elimina)
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        if self.ttl is not None and self._reloj() - entrada.creada > self.ttl:
+            self._quitar(clave)
+            self.expirados += 1
+            return None
+        return entrada
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave)
+        self.bytes -= entrada.bytes
+
+    def _entregar(self, entrada):
+        return entrada.valor if entrada.compartido else copy.deepcopy(entrada.valor)
+
+    def obtener(self, clave, calcular, compartido=None, proteger=True):
+        """
+        Devuelve el valor guardado bajo 'clave' o, si no está (o expiró), llama
+        a calcular(), lo guarda y lo devuelve. 'compartido' reemplaza el valor
+        por defecto de la caché para esta entrada; con proteger=False un valor
+        compartido no se marca como de solo lectura.
+        """
+        with self._lock:
+            entrada = self._vigente(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+        if entrada is not None:
+            return self._entregar(entrada)
+
+        # Se calcula fuera del lock para no bloquear a las demás sesiones; si dos
+        # sesiones piden la misma clave a la vez, se guarda el último resultado
+        valor = calcular()
+        return self.guardar(clave, valor, compartido, proteger)
+
+    def consultar(self, clave):
+        """Devuelve el valor guardado bajo 'clave', o None si no está (no calcula nada)."""
+        with self._lock:
+            entrada = self._vigente(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+        return self._entregar(entrada)
+
+    def guardar(self, clave, valor, compartido=None, proteger=True):
+        """Guarda 'valor' bajo 'clave' (desalojando lo necesario) y lo devuelve."""
+        if compartido is None:
+            compartido = self.compartido
+        if compartido and proteger:
+            solo_lectura(valor)
+        entrada = _Entrada(valor, tamano_en_bytes(valor), self._reloj(), compartido)
+
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            if self.max_bytes is not None and entrada.bytes > self.max_bytes:
+                # No cabe ni con la caché vacía: se entrega sin guardar
+                self.rechazados += 1
+                return valor
+            self._entradas[clave] = entrada
+            self.bytes += entrada.bytes
+            self._desalojar()
+        return self._entregar(entrada)
+
+    def _desalojar(self):
+        # Primero las expiradas, luego las menos usadas hasta cumplir los límites
+        if self.ttl is not None:
+            ahora = self._reloj()
+            for clave in [c for c, e in self._entradas.items() if ahora - e.creada > self.ttl]:
+                self._quitar(clave)
+                self.expirados += 1
+        while self._entradas and (
+            (self.max_entradas is not None and len(self._entradas) > self.max_entradas)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self._quitar(next(iter(self._entradas)))
+            self.desalojos += 1
+
+    def remedir(self, clave):
+        """
+        Vuelve a medir los bytes de una entrada cuyo valor cambió en el lugar (por
+        ejemplo, una IngestaIncremental que publicó una versión nueva) y desaloja
+        lo necesario si ahora se pasa del presupuesto.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if entrada is None:
+            return
+        # La medición puede recorrer todo el objeto: se hace fuera del lock
+        bytes_ = tamano_en_bytes(entrada.valor)
+        with self._lock:
+            if self._entradas.get(clave) is entrada:
+                self.bytes += bytes_ - entrada.bytes
+                entrada.bytes = bytes_
+                self._desalojar()
+
+    def estadisticas(self):
+        """Contadores para monitorear la caché."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self.bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "desalojos": self.desalojos,
+                "expirados": self.expirados,
+                "rechazados": self.rechazados,
+            }
+
+    def memoizar(self, funcion=None, compartido=None, proteger=True):
+        """
+        Decorador: guarda el resultado de la función según sus argumentos (que
+        deben ser hashables). Se usa como @cache.memoizar o @cache.memoizar(compartido=False).
+        funcion.remedir(*args) vuelve a medir el resultado guardado para esos argumentos.
+        """
+        if funcion is None:
+            return functools.partial(self.memoizar, compartido=compartido, proteger=proteger)
+
+        def clave(args, kwargs):
+            return (funcion.__module__, funcion.__qualname__, args, tuple(sorted(kwargs.items())))
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            return self.obtener(clave(args, kwargs), lambda: funcion(*args, **kwargs), compartido, proteger)
+
+        envoltura.remedir = lambda *args, **kwargs: self.remedir(clave(args, kwargs))
+        return envoltura
+
+
+def _variable_entorno(nombre, convertir):
+    valor = os.environ.get(nombre, "")
+    return convertir(valor) if valor else None
+
+
+_cache_global = None
+_lock_global = threading.Lock()
+
+
+def cache_global():
+    """La caché del proceso, creada la primera vez con la configuración del entorno."""
+    global _cache_global
+    with _lock_global:
+        if _cache_global is None:
+            max_mb = _variable_entorno("DASHBOARD_CACHE_MAX_MB", float)
+            _cache_global = CacheDatos(
+                max_entradas=_variable_entorno("DASHBOARD_CACHE_MAX_ENTRADAS", int),
+                ttl=_variable_entorno("DASHBOARD_CACHE_TTL_S", float),
+                max_bytes=int((MEMORIA_MAXIMA_MB + 512 if max_mb is None else max_mb) * 1024 * 1024),
+            )
+        return _cache_global
@@ -0,0 +1,255 @@
+# datos_yt.py
+
+"""
+Carga columnar del CSV de estadísticas de YouTube (YT-STATS).
+
+En lugar de devolver una lista de filas donde cada celda es un string, el CSV
+se lee una sola vez y cada columna se convierte a un arreglo de NumPy con su
+tipo definitivo:
+  - vistas, likes, comentarios   -> int64
+  - publicado, actualizado       -> datetime64[s]
+  - duración                     -> segundos (int64)
+  - playlist(s), Ayudante        -> códigos categóricos (int32) + lista de categorías
+  - el resto de las columnas     -> texto (arreglos de objetos str, o ColumnaTexto
+                                    si la tabla se abrió desde un snapshot)
+
+Así las páginas del dashboard trabajan directamente con los arreglos ya
+convertidos y no vuelven a hacer int(row[7]) en cada interacción.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# --- Columnas del CSV según su tipo ---
+COLUMNAS_ENTERAS = ("vistas", "likes", "comentarios")
+COLUMNAS_FECHA = ("publicado", "actualizado")
+COLUMNAS_CATEGORICAS = ("playlist(s)", "Ayudante")
+COLUMNA_DURACION = "duración"
+
+# Formato de fecha usado por la exportación, por ejemplo "4/05/2025 23:07:06"
+FORMATO_FECHA = "%d/%m/%Y %H:%M:%S"
+
+# Duración "H:MM:SS" o "MM:SS" (la hora es opcional); también sin ceros a la
+# izquierda, como "1:2:3"
+_PATRON_DURACION = re.compile(r"^\s*(?:(\d+):)?(\d+):(\d{1,2})\s*$")
+
+
+class ColumnaTexto:
+    """
+    Columna de texto guardada como en Arrow: todos los strings codificados en
+    UTF-8 uno tras otro en un arreglo de bytes, más un arreglo de posiciones
+    (offsets) donde empieza cada uno. Ambos arreglos pueden ser memory-maps, así
+    que abrir la columna no obliga a leer ni decodificar todos los textos.
+
+    Indexar con un entero devuelve un str; con un slice, una máscara o un arreglo
+    de índices devuelve un arreglo de objetos str (como las columnas de texto en memoria).
+    """
+
+    def __init__(self, datos, offsets):
+        self.datos = datos        # uint8, todos los textos concatenados
+        self.offsets = offsets    # int64, largo n + 1
+
+    @classmethod
+    def desde_textos(cls, textos):
+        codificados = [t.encode("utf-8") for t in textos]
+        largos = np.fromiter((len(c) for c in codificados), dtype=np.int64, count=len(codificados))
+        offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum(largos, out=offsets[1:])
+        datos = np.frombuffer(b"".join(codificados), dtype=np.uint8)
+        return cls(datos, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _texto(self, i):
+        return self.datos[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __getitem__(self, indice):
+        if isinstance(indice, (int, np.integer)):
+            if indice < 0:
+                indice += len(self)
+            if not 0 <= indice < len(self):
+                raise IndexError(indice)
+            return self._texto(indice)
+        if isinstance(indice, slice):
+            filas = range(len(self))[indice]
+        else:
+            filas = np.arange(len(self))[indice]
+        salida = np.empty(len(filas), dtype=object)
+        for k, i in enumerate(filas):
+            salida[k] = self._texto(i)
+        return salida
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._texto(i)
+
+    def tolist(self):
+        # Todos los textos de una vez: se copian los bytes a un solo objeto bytes y
+        # se corta cada texto de ahí, sin crear un arreglo de NumPy por texto
+        crudo = self.datos.tobytes()
+        posiciones = self.offsets.tolist()
+        return [crudo[inicio:fin].decode("utf-8") for inicio, fin in zip(posiciones[:-1], posiciones[1:])]
+
+
+@dataclass
+class TablaYT:
+    """
+    Dataset YT-STATS en formato columnar.
+
+    - encabezados: nombres de columnas en el orden del CSV
+    - columnas   : diccionario nombre -> arreglo de NumPy ya tipado
+    - categorias : para cada columna categórica, la lista de valores distintos;
+                   en 'columnas' se guarda el código (posición en esta lista)
+                   o -1 si la celda estaba vacía
+    - errores    : para cada columna convertida, los índices de fila cuyas celdas
+                   no se pudieron interpretar (quedan en 0 / NaT)
+    """
+    encabezados: list
+    columnas: dict
+    categorias: dict = field(default_factory=dict)
+    errores: dict = field(default_factory=dict)
+
+    def __getitem__(self, nombre):
+        return self.columnas[nombre]
+
+    def __len__(self):
+        return len(self.columnas[self.encabezados[0]]) if self.encabezados else 0
+
+    def validos(self, nombre):
+        """Máscara booleana con True en las filas cuya celda se convirtió bien."""
+        mascara = np.ones(len(self), dtype=bool)
+        mascara[self.errores.get(nombre, [])] = False
+        return mascara
+
+    def decodificar(self, nombre, codigos=None):
+        """Devuelve los valores de texto de una columna categórica ("" si faltaba)."""
+        if codigos is None:
+            codigos = self.columnas[nombre]
+        valores = np.array(list(self.categorias[nombre]) + [""], dtype=object)
+        return valores[codigos]  # el código -1 apunta al "" agregado al final
+
+    def seleccionar(self, filas):
+        """TablaYT con solo las 'filas' indicadas (en ese orden)."""
+        columnas = {}
+        for nombre in self.encabezados:
+            columnas[nombre] = self.columnas[nombre][filas]
+        errores = {}
+        for nombre in self.errores:
+            malas = ~self.validos(nombre)
+            errores[nombre] = np.flatnonzero(malas[filas])
+        return TablaYT(self.encabezados, columnas, self.categorias, errores)
+
+    def vista(self, inicio, fin):
+        """
+        Devuelve las filas [inicio, fin) como diccionario columna -> lista,
+        listo para pasar a st.dataframe.
+        """
+        return self.vista_filas(slice(inicio, fin))
+
+    def vista_filas(self, filas, columnas=None):
+        """
+        Como vista(), pero para las filas indicadas ('filas' es un slice o un
+        arreglo de números de fila, en el orden en que se quieren mostrar) y solo
+        las 'columnas' pedidas (todas si es None). Solo se leen esas celdas.
+        """
+        salida = {}
+        for nombre in self.encabezados if columnas is None else columnas:
+            if nombre in self.categorias:
+                valores = self.decodificar(nombre, self.columnas[nombre][filas])
+            else:
+                valores = self.columnas[nombre][filas]
+            salida[nombre] = valores.tolist()
+        return salida
+
+
+def _a_enteros(serie):
+    """Convierte una columna de texto a int64; las celdas inválidas quedan en 0."""
+    numeros = pd.to_numeric(serie.str.strip(), errors="coerce")
+    malas = numeros.isna().to_numpy()
+    return numeros.fillna(0).to_numpy(dtype=np.int64), np.flatnonzero(malas)
+
+
+def _a_fechas(serie):
+    """Convierte una columna de texto a datetime64[s]; las celdas inválidas quedan en NaT."""
+    fechas = pd.to_datetime(serie, format=FORMATO_FECHA, errors="coerce")
+    malas = fechas.isna().to_numpy()
+    return fechas.to_numpy(dtype="datetime64[s]"), np.flatnonzero(malas)
+
+
+def parsear_duraciones(textos):
+    """
+    Convierte toda una columna de duraciones "H:MM:SS" o "MM:SS" a segundos en
+    una sola operación (una expresión regular aplicada a la columna completa).
+    Los minutos y segundos pueden venir sin el cero a la izquierda ("1:2:3").
+
+    Devuelve (segundos int64, índices de las celdas mal formadas). Las celdas
+    mal formadas (vacías, con texto, o con minutos/segundos >= 60) quedan en 0
+    y se informan en lugar de ocultarse.
+    """
+    partes = pd.Series(textos, dtype=object).astype(str).str.extract(_PATRON_DURACION)
+    horas = pd.to_numeric(partes[0]).fillna(0).to_numpy()
+    minutos = pd.to_numeric(partes[1]).to_numpy()
+    segundos = pd.to_numeric(partes[2]).to_numpy()
+
+    # Sin hora, "MM:SS" admite más de 59 minutos; con hora, no
+    malas = np.isnan(segundos) | (segundos >= 60) | (partes[0].notna().to_numpy() & (minutos >= 60))
+    total = horas * 3600 + minutos * 60 + segundos
+    total[malas] = 0
+    return total.astype(np.int64), np.flatnonzero(malas)
+
+
+def convertir_columna(nombre, serie):
+    """
+    Convierte una columna numérica o de fecha (serie de strings) a su tipo.
+    Devuelve (arreglo convertido, índices de las celdas que no se pudieron leer).
+    """
+    if nombre in COLUMNAS_ENTERAS:
+        return _a_enteros(serie)
+    if nombre in COLUMNAS_FECHA:
+        return _a_fechas(serie)
+    if nombre == COLUMNA_DURACION:
+        return parsear_duraciones(serie)
+    raise ValueError("La columna '" + nombre + "' no es numérica ni de fecha")
+
+
+def _a_categorica(valores):
+    """
+    Convierte una columna de texto en códigos enteros.
+    Devuelve (códigos int32, lista de categorías ordenadas); las celdas vacías
+    reciben el código -1.
+    """
+    categorias, codigos = np.unique(np.asarray(valores, dtype=object), return_inverse=True)
+    codigos = codigos.astype(np.int32)
+    categorias = list(categorias)
+    if categorias and categorias[0] == "":
+        # "" queda primero al ordenar: lo sacamos y corremos los códigos en uno
+        categorias = categorias[1:]
+        codigos -= 1
+    return codigos, categorias
+
+
+def cargar_tabla(path):
+    """
+    Lee el CSV de YT-STATS una sola vez y devuelve una TablaYT con todas las
+    columnas convertidas a su tipo.
+    """
+    crudo = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8")
+    encabezados = list(crudo.columns)
+
+    columnas = {}
+    categorias = {}
+    errores = {}
+    for nombre in encabezados:
+        serie = crudo[nombre]
+        if nombre in COLUMNAS_CATEGORICAS:
+            columnas[nombre], categorias[nombre] = _a_categorica(serie.to_numpy(dtype=object))
+        elif nombre in COLUMNAS_ENTERAS or nombre in COLUMNAS_FECHA or nombre == COLUMNA_DURACION:
+            columnas[nombre], errores[nombre] = convertir_columna(nombre, serie)
+        else:
+            columnas[nombre] = serie.to_numpy(dtype=object)
+
+    return TablaYT(encabezados, columnas, categorias, errores)
@@ -10,19 +10,42 @@ a una semilla (seed) fija tanto para Faker como para random.
 
 Para ejecutarlo, instale Faker si no lo tiene:
     pip install Faker
+
+Modo masivo (para pruebas de carga de los dashboards, millones de filas):
+    python demo_faker.py --filas 5000000 --procesos 8 --salida alumnos_5M.csv
+
+En ese modo el archivo se genera por trozos de FILAS_POR_TROZO filas: los nombres
+se crean en varios procesos en paralelo, los puntajes con el generador vectorizado
+de NumPy y cada trozo se escribe apenas está listo (nunca está todo en memoria).
+Cada trozo usa su propia semilla derivada de SEED y de su número de trozo, así que
+el archivo resultante es siempre el mismo para una misma SEED, sin importar
+cuántos procesos se usen.
+
+En ambos modos --salida cambia el archivo generado:
+    python demo_faker.py --salida /tmp/alumnos.csv
+
+Con --formato parquet o --formato arrow el archivo se guarda en formato columnar
+comprimido (ver formato_columnar.py) en vez de CSV, en ambos modos:
+    python demo_faker.py --formato parquet
+    python demo_faker.py --filas 5000000 --formato parquet --salida alumnos_5M.parquet
 """
 
-import pandas as pd  # Importar pandas para manejar el CSV
+import argparse
+import io
+import multiprocessing
+import os
 import random
+
+import numpy as np
+import pandas as pd  # Importar pandas para manejar el CSV
 from faker import Faker
 
+from formato_columnar import EscritorColumnar, con_formato, escribir_tabla, formato_de
+
 # -------------------------------
 # 1. Configurar la semilla fija
 # -------------------------------
 SEED = 12345
-random.seed(SEED)            # Semilla para random.randint
-Faker.seed(SEED)             # Semilla para Faker
-faker = Faker("es_CL")       # Faker configurado para nombres en español de Chile (opcional)
 
 # -------------------------------
 # 2. Definir el nombre del CSV
@@ -34,36 +57,149 @@ NOMBRE_ARCHIVO = "datos_alumnos_faker.csv"
 # -------------------------------
 NUM_ALUMNOS = 500  # Puedes cambiar este número si quieres más o menos filas
 
+# Modo masivo: filas que genera cada tarea (y que se escriben de una vez)
+FILAS_POR_TROZO = 50_000
+
 # -------------------------------
 # 4. Rango de puntajes
 # -------------------------------
 MIN_NOTA = 40
 MAX_NOTA = 70
 
+ENCABEZADOS = ["nombre", "pep1", "pep2", "control1", "control2"]
+
+
 # -------------------------------
 # 5. Generar los datos
 # -------------------------------
-# Crear una lista de listas para almacenar los datos
-datos = []
-encabezados = ["nombre", "pep1", "pep2", "control1", "control2"]
+def generar_simple(formato="csv", salida=NOMBRE_ARCHIVO):
+    """
+    Genera NUM_ALUMNOS filas una por una y las guarda en 'salida' (con la
+    extensión de 'formato': "csv", "parquet" o "arrow").
+    """
+    random.seed(SEED)            # Semilla para random.randint
+    Faker.seed(SEED)             # Semilla para Faker
+    faker = Faker("es_CL")       # Faker configurado para nombres en español de Chile (opcional)
+
+    # Crear una lista de listas para almacenar los datos
+    datos = []
+
+    for i in range(NUM_ALUMNOS):
+        # Generar un nombre completo aleatorio
+        nombre_alumno = faker.name()
+
+        # Generar puntajes aleatorios para pep1, pep2, control1 y control2
+        pep1 = random.randint(MIN_NOTA, MAX_NOTA)
+        pep2 = random.randint(MIN_NOTA, MAX_NOTA)
+        control1 = random.randint(MIN_NOTA, MAX_NOTA)
+        control2 = random.randint(MIN_NOTA, MAX_NOTA)
+
+        # Agregar los datos como una lista
+        datos.append([nombre_alumno, pep1, pep2, control1, control2])
+
+    # Convertir la lista de listas en un DataFrame de pandas
+    df = pd.DataFrame(datos, columns=ENCABEZADOS)
+
+    # Guardar el DataFrame como un archivo CSV (o Parquet / Arrow)
+    nombre_archivo = con_formato(salida, formato)
+    if formato == "csv":
+        df.to_csv(nombre_archivo, index=False, encoding="utf-8")
+    else:
+        escribir_tabla(df.astype(dict.fromkeys(ENCABEZADOS[1:], "uint8")), nombre_archivo, formato)
+
+    print("Se ha generado el archivo '" + nombre_archivo + "' con " + str(NUM_ALUMNOS) + " filas de ejemplo.")
+
+
+# -------------------------------
+# 6. Modo masivo (en paralelo)
+# -------------------------------
+_faker_proceso = None  # un Faker por proceso de trabajo (crearlo es lento)
+
+
+def _iniciar_proceso():
+    global _faker_proceso
+    _faker_proceso = Faker("es_CL")
+
+
+def generar_tabla_trozo(tarea):
+    """
+    Genera el trozo número 'indice' con 'n' filas como DataFrame.
+    La semilla depende solo de SEED y del número de trozo.
+    """
+    indice, n = tarea
+    semilla = np.random.SeedSequence([SEED, indice])
+    faker_semilla, notas_semilla = semilla.spawn(2)
+
+    _faker_proceso.seed_instance(int(faker_semilla.generate_state(1)[0]))
+    nombres = [_faker_proceso.name() for _ in range(n)]
+
+    # Las 4 notas de todas las filas del trozo en una sola llamada
+    rng = np.random.default_rng(notas_semilla)
+    notas = rng.integers(MIN_NOTA, MAX_NOTA + 1, size=(n, 4), dtype=np.int16)
+
+    # Las notas (de 0 a 100) caben en uint8; así quedan también en Parquet / Arrow
+    trozo = pd.DataFrame(notas.astype(np.uint8), columns=ENCABEZADOS[1:])
+    trozo.insert(0, "nombre", nombres)
+    return trozo
+
+
+def generar_trozo(tarea):
+    """El trozo de generar_tabla_trozo ya como texto CSV (sin encabezados)."""
+    salida = io.StringIO()
+    generar_tabla_trozo(tarea).to_csv(salida, index=False, header=False)
+    return salida.getvalue()
+
 
-for i in range(NUM_ALUMNOS):
-    # Generar un nombre completo aleatorio
-    nombre_alumno = faker.name()
+def generar_masivo(n_filas, salida, procesos=None, filas_por_trozo=FILAS_POR_TROZO):
+    """
+    Escribe 'n_filas' filas en 'salida' usando 'procesos' procesos (por defecto,
+    todos los núcleos). Los trozos se escriben en orden a medida que terminan.
+    El formato (CSV, Parquet o Arrow) se elige por la extensión de 'salida';
+    en Parquet cada trozo queda como un grupo de filas.
+    """
+    tareas = []
+    for indice, inicio in enumerate(range(0, n_filas, filas_por_trozo)):
+        tareas.append((indice, min(filas_por_trozo, n_filas - inicio)))
+    procesos = procesos or os.cpu_count() or 1
 
-    # Generar puntajes aleatorios para pep1, pep2, control1 y control2
-    pep1 = random.randint(MIN_NOTA, MAX_NOTA)
-    pep2 = random.randint(MIN_NOTA, MAX_NOTA)
-    control1 = random.randint(MIN_NOTA, MAX_NOTA)
-    control2 = random.randint(MIN_NOTA, MAX_NOTA)
+    if formato_de(salida) == "csv":
+        with open(salida, "w", encoding="utf-8", newline="") as f:
+            f.write(",".join(ENCABEZADOS) + "\n")
+            with multiprocessing.Pool(procesos, initializer=_iniciar_proceso) as pool:
+                # imap entrega los resultados en el orden de las tareas: el archivo no
+                # depende de qué proceso termina primero
+                for escritos, texto in enumerate(pool.imap(generar_trozo, tareas), 1):
+                    f.write(texto)
+                    print("Trozo " + str(escritos) + " de " + str(len(tareas)) + " escrito.", flush=True)
+    elif not tareas:
+        # Sin trozos el escritor nunca abriría el archivo: se escribe una tabla vacía
+        # con los mismos tipos que los trozos (nombre de texto, notas uint8)
+        vacia = pd.DataFrame({"nombre": pd.Series([], dtype=str)})
+        for columna in ENCABEZADOS[1:]:
+            vacia[columna] = pd.Series([], dtype=np.uint8)
+        escribir_tabla(vacia, salida)
+    else:
+        with EscritorColumnar(salida, filas_por_grupo=filas_por_trozo) as escritor, \
+                multiprocessing.Pool(procesos, initializer=_iniciar_proceso) as pool:
+            for escritos, trozo in enumerate(pool.imap(generar_tabla_trozo, tareas), 1):
+                escritor.escribir(trozo)
+                print("Trozo " + str(escritos) + " de " + str(len(tareas)) + " escrito.", flush=True)
 
-    # Agregar los datos como una lista
-    datos.append([nombre_alumno, pep1, pep2, control1, control2])
+    print("Se ha generado el archivo '" + salida + "' con " + str(n_filas) + " filas.")
 
-# Convertir la lista de listas en un DataFrame de pandas
-df = pd.DataFrame(datos, columns=encabezados)
 
-# Guardar el DataFrame como un archivo CSV
-df.to_csv(NOMBRE_ARCHIVO, index=False, encoding="utf-8")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un CSV de alumnos con datos de ejemplo.")
+    parser.add_argument("--filas", type=int, help="modo masivo: cantidad de filas a generar")
+    parser.add_argument("--procesos", type=int, help="procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--salida", help="archivo de salida (por defecto, " + NOMBRE_ARCHIVO + ")")
+    parser.add_argument("--formato", choices=["csv", "parquet", "arrow"],
+                        help="formato del archivo (por defecto, el de la extensión de --salida, o csv)")
+    args = parser.parse_args()
 
-print("Se ha generado el archivo '" + NOMBRE_ARCHIVO + "' con " + str(NUM_ALUMNOS) + " filas de ejemplo.")
+    formato = args.formato or (formato_de(args.salida) if args.salida else "csv")
+    salida = con_formato(args.salida or NOMBRE_ARCHIVO, formato)
+    if args.filas is None:
+        generar_simple(formato, salida)
+    else:
+        generar_masivo(args.filas, salida, args.procesos)
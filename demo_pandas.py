@@ -14,43 +14,121 @@ Este script muestra cómo:
 Para ejecutarlo:
   1. Asegúrate de tener instalado pandas:
        pip install pandas
+
+Para archivos más grandes que la memoria hay un modo por trozos y en varios
+procesos (ver pipeline_notas.py):
+    python demo_pandas.py --pipeline --entrada alumnos_5M.csv --procesos 8
+
+El archivo ordenado se arma con un ordenamiento externo (corridas en archivos
+temporales que luego se mezclan, ver orden_externo.py). Opciones del modo por trozos:
+    --memoria-mb 256   presupuesto de memoria para los trozos en vuelo
+    --top 100          guardar solo los 100 mejores promedios (heap acotado, sin corridas)
+
+Con --compacto el DataFrame se carga con tipos angostos (notas uint8, promedio
+float32, nombres como category o texto de Arrow) y se muestra cuánta memoria
+ocupaba antes y después:
+    python demo_pandas.py --compacto --entrada datos_alumnos_faker.csv
+
+Con --formato parquet o --formato arrow el archivo ordenado se guarda en formato
+columnar (datos_alumnos_ordenado.parquet / .arrow, ver formato_columnar.py), que
+los dashboards leen sin volver a convertir el texto. La entrada del modo simple
+también puede ser un .parquet o .arrow (por ejemplo, el de demo_faker.py --formato).
 """
 
+import argparse
+
 import pandas as pd  # Importar la librería pandas con alias 'pd'
 
-# 1) Leer el CSV en un DataFrame
-# Suponemos que 'datos_alumnos.csv' existe en la misma carpeta
-df = pd.read_csv("datos_alumnos.csv")
+from formato_columnar import con_formato, escribir_tabla, formato_de, leer_columnar
+from pipeline_notas import COLUMNAS_NOTAS, UMBRAL_DESTACADOS, compactar, reporte_memoria, reporte_por_trozos
+
+
+def reporte_simple(entrada="datos_alumnos.csv", compacto=False, formato="csv"):
+    """Los pasos 1) a 7) con un DataFrame en memoria (para archivos pequeños)."""
+    # 1) Leer el CSV en un DataFrame
+    # Suponemos que 'datos_alumnos.csv' existe en la misma carpeta
+    if formato_de(entrada) == "csv":
+        df = pd.read_csv(entrada)
+    else:
+        df = leer_columnar(entrada)
+
+    if compacto:
+        # Pasar cada columna (incluido el promedio) al tipo más angosto que guarda sus valores
+        original = df.assign(promedio=df[COLUMNAS_NOTAS].mean(axis=1))
+        df = compactar(original)
+        print("===== Memoria por columna (tipos originales vs. compactos) =====")
+        print(reporte_memoria(original, df))
+        print()
+
+    # 2) Mostrar las primeras filas del DataFrame
+    print("===== Primeras 5 filas del DataFrame =====")
+    print(df.head(5))  # head(5) muestra las primeras 5 filas
+
+    # 3) Mostrar estadísticas descriptivas de las columnas numéricas
+    print("\n===== Estadísticas descriptivas =====")
+    print(df.describe())  
+    # describe() muestra conteo, media, desviación estándar, mínimo, percentiles y máximo
+
+    # 4) Calcular una columna nueva: promedio de las 4 notas
+    # Crear una nueva columna llamada 'promedio'
+    # (con tipos compactos ya está calculada: sumar columnas uint8 se desbordaría)
+    if not compacto:
+        df["promedio"] = (df["pep1"] + df["pep2"] + df["control1"] + df["control2"]) / 4
+
+    # Mostrar el DataFrame con la columna nueva
+    print("\n===== DataFrame con columna 'promedio' =====")
+    print(df[["nombre", "pep1", "pep2", "control1", "control2", "promedio"]])
+
+    # 5) Ordenar el DataFrame según el promedio, de mayor a menor
+    df_ordenado = df.sort_values(by="promedio", ascending=False)
 
-# 2) Mostrar las primeras filas del DataFrame
-print("===== Primeras 5 filas del DataFrame =====")
-print(df.head(5))  # head(5) muestra las primeras 5 filas
+    print("\n===== DataFrame ordenado por promedio (descendente) =====")
+    print(df_ordenado[["nombre", "promedio"]])
 
-# 3) Mostrar estadísticas descriptivas de las columnas numéricas
-print("\n===== Estadísticas descriptivas =====")
-print(df.describe())  
-# describe() muestra conteo, media, desviación estándar, mínimo, percentiles y máximo
+    # 6) Filtrar los alumnos que tengan promedio >= 85
+    filtro_alto = df[df["promedio"] >= 85]
 
-# 4) Calcular una columna nueva: promedio de las 4 notas
-# Crear una nueva columna llamada 'promedio'
-df["promedio"] = (df["pep1"] + df["pep2"] + df["control1"] + df["control2"]) / 4
+    print("\n===== Alumnos con promedio >= 85 =====")
+    print(filtro_alto[["nombre", "promedio"]])
 
-# Mostrar el DataFrame con la columna nueva
-print("\n===== DataFrame con columna 'promedio' =====")
-print(df[["nombre", "pep1", "pep2", "control1", "control2", "promedio"]])
+    # 7) Guardar el DataFrame ordenado en un nuevo CSV (opcional)
+    salida = con_formato("datos_alumnos_ordenado.csv", formato)
+    escribir_tabla(df_ordenado, salida)
+    print("\nSe ha guardado el DataFrame ordenado en '" + salida + "'")
 
-# 5) Ordenar el DataFrame según el promedio, de mayor a menor
-df_ordenado = df.sort_values(by="promedio", ascending=False)
 
-print("\n===== DataFrame ordenado por promedio (descendente) =====")
-print(df_ordenado[["nombre", "promedio"]])
+def reporte_pipeline(entrada, procesos, memoria_mb=None, top=None, formato="csv"):
+    """El mismo reporte, por trozos y en varios procesos (ver pipeline_notas.py)."""
+    memoria_maxima = memoria_mb * 1024 * 1024 if memoria_mb is not None else None
+    salida = con_formato("datos_alumnos_ordenado.csv", formato)
+    alumnos, promedio, destacados = reporte_por_trozos(
+        entrada, salida, "datos_alumnos_destacados.csv", procesos,
+        memoria_maxima=memoria_maxima, top=top,
+    )
+    print("===== Reporte por trozos =====")
+    print("Alumnos: " + str(alumnos))
+    print("Promedio general: " + str(round(promedio, 2)))
+    print("Alumnos con promedio >= " + str(UMBRAL_DESTACADOS) + ": " + str(destacados)
+          + " (guardados en 'datos_alumnos_destacados.csv')")
+    if top is None:
+        print("Se ha guardado el archivo ordenado en '" + salida + "'")
+    else:
+        print("Se han guardado los " + str(top) + " mejores promedios en '" + salida + "'")
 
-# 6) Filtrar los alumnos que tengan promedio >= 85
-filtro_alto = df[df["promedio"] >= 85]
 
-print("\n===== Alumnos con promedio >= 85 =====")
-print(filtro_alto[["nombre", "promedio"]])
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reporte de notas con pandas.")
+    parser.add_argument("--pipeline", action="store_true", help="procesar por trozos en varios procesos")
+    parser.add_argument("--entrada", default="datos_alumnos.csv", help="CSV de entrada")
+    parser.add_argument("--procesos", type=int, help="procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--compacto", action="store_true", help="cargar con tipos angostos y mostrar la memoria usada")
+    parser.add_argument("--formato", choices=["csv", "parquet", "arrow"], default="csv",
+                        help="formato del archivo ordenado")
+    parser.add_argument("--memoria-mb", type=int, help="modo por trozos: presupuesto de memoria en MB")
+    parser.add_argument("--top", type=int, help="modo por trozos: guardar solo los N mejores promedios")
+    args = parser.parse_args()
 
-# 7) Guardar el DataFrame ordenado en un nuevo CSV (opcional)
-df_ordenado.to_csv("datos_alumnos_ordenado.csv", index=False)
-print("\nSe ha guardado el DataFrame ordenado en 'datos_alumnos_ordenado.csv'")
+    if args.pipeline or args.memoria_mb is not None or args.top is not None:
+        reporte_pipeline(args.entrada, args.procesos, args.memoria_mb, args.top, args.formato)
+    else:
+        reporte_simple(args.entrada, args.compacto, args.formato)
@@ -6,16 +6,39 @@ Demo explicativa de Streamlit
   4) Crear un gráfico de líneas.
   5) Crear un gráfico de área.
   
-En esta demo:
+En los fragmentos de código que se muestran en las páginas:
 - NO usamos diccionarios, tuplas, ni comprensiones de listas.
 - NO usamos f-strings; solo concatenación de cadenas.
 - NO usamos "break" ni estructuras avanzadas.
 - TODO se hace con listas, bucles y operaciones básicas.
+
+El código que la app ejecuta por dentro es distinto, para que funcione con
+muchos alumnos:
+- Las notas de cada lote se convierten con NumPy, todas de una vez y sin
+  try/except (ver convertir_notas): una celda vacía o con texto queda como NaN
+  y no cuenta en los promedios. El try/except se usa solo al cargar el archivo.
+- Los promedios se calculan una sola vez, con NumPy, y quedan en caché.
+- El CSV se lee por lotes con un generador (leer_en_lotes): el texto de cada
+  lote se convierte y se descarta, así que el archivo nunca está entero en
+  memoria como texto. Lo que sí se guarda completo es lo que usan las páginas:
+  los nombres, las notas (arreglo de NumPy) y los promedios, unos 48 bytes por
+  alumno más su nombre. Esa memoria crece con la cantidad de alumnos.
+- Además del CSV, la app lee archivos Parquet o Arrow (ver formato_columnar.py,
+  se generan con demo_faker.py --formato o demo_pandas.py --formato): solo las
+  columnas que usa y, si el archivo trae el promedio, solo las filas sobre el
+  promedio mínimo elegido.
 """
 
 # --- Importar librerías necesarias ---
 import streamlit as st      # Librería principal para crear la app
 import csv                  # Para leer archivos CSV (sin pandas)
+import numpy as np          # Para calcular todos los promedios de una vez
+import pandas as pd         # Solo para entregarle las tablas a st.dataframe
+import os                   # Para ver qué archivos de datos existen
+
+from cache_datos import cache_global
+from formato_columnar import formato_de, leer_columnar
+from snapshot import firma_archivo
 
 # --- Configuración general de la página ---
 st.set_page_config(
@@ -78,40 +101,250 @@ st.sidebar.markdown(
 )
 
 
+# --- Tamaño de lote para leer el CSV ---
+# El archivo se lee de a FILAS_POR_LOTE filas: el texto leído y convertido a la
+# vez no depende del tamaño del archivo (los resultados sí, ver cargar_datos).
+FILAS_POR_LOTE = 10000
+
+# --- Filas por página en las tablas ---
+# Las tablas se envían de a una página: el navegador recibe siempre a lo más
+# FILAS_POR_PAGINA filas, sin importar cuántos alumnos haya.
+FILAS_POR_PAGINA = 25
+
+# --- Ponderación de cada nota para el promedio ponderado ---
+# En el mismo orden que las columnas: pep1, pep2, control1, control2
+PONDERACIONES = [0.3, 0.3, 0.2, 0.2]
+
+
+# --- Generador que lee el CSV por lotes ---
+def leer_en_lotes(path_csv, filas_por_lote):
+    """
+    Lee el CSV de a 'filas_por_lote' filas y entrega (con 'yield') cada lote
+    ya convertido como [nombres, notas]:
+      - nombres: lista con el nombre de cada alumno del lote
+      - notas  : arreglo de NumPy de (alumnos x 4) con pep1, pep2, control1 y control2.
+                 Una celda vacía o con texto queda como NaN ("no es un número"),
+                 para que no cuente en los promedios.
+
+    Un generador no arma la lista completa: entrega un lote, espera a que lo
+    usemos y recién entonces lee el siguiente.
+    """
+    with open(path_csv, "r", encoding="utf-8") as f:
+        lector = csv.reader(f)
+        next(lector)  # Saltamos la línea de encabezados
+        nombres = []
+        textos = []
+        for fila in lector:
+            # Si la fila viene incompleta, completamos con celdas vacías
+            while len(fila) < 5:
+                fila.append("")
+            nombres.append(fila[0])
+            textos.append(fila[1:5])
+            if len(nombres) == filas_por_lote:
+                yield [nombres, convertir_notas(textos)]
+                nombres = []  # Empezamos un lote nuevo; el anterior se libera
+                textos = []
+        # El último lote puede quedar incompleto
+        if len(nombres) > 0:
+            yield [nombres, convertir_notas(textos)]
+
+
+def convertir_notas(textos):
+    """
+    Convierte una lista de filas de textos (["  75", "82", "abc", ""]) en un
+    arreglo de NumPy de números, todo el lote de una vez y sin try/except:
+    las celdas que no son un entero quedan como NaN.
+    """
+    celdas = np.char.strip(np.array(textos, dtype=str).reshape(len(textos), 4))
+    validas = np.char.isdigit(celdas)  # True solo si la celda son dígitos
+    notas = np.full(celdas.shape, np.nan)
+    notas[validas] = celdas[validas].astype(np.int64)
+    return notas
+
+
+def calcular_promedios(notas, ponderaciones):
+    """
+    Calcula para cada alumno su promedio simple y su promedio ponderado con una
+    sola multiplicación de matrices: (alumnos x 4) @ (4 x 2).
+    Las notas NaN no cuentan: se reemplazan por 0 y además se descuenta su peso,
+    así el promedio se hace solo con las notas válidas.
+    Devuelve un arreglo de (alumnos x 2): columna 0 = simple, columna 1 = ponderado.
+    Si un alumno no tiene ninguna nota válida, sus promedios quedan en NaN.
+    """
+    pesos = np.column_stack([np.ones(4), np.array(ponderaciones, dtype=float)])
+    validas = ~np.isnan(notas)
+    sumas = np.where(validas, notas, 0.0) @ pesos
+    pesos_validos = validas @ pesos
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sumas / pesos_validos
+
+
+# --- Tabla paginada ---
+def mostrar_tabla_paginada(nombres_columnas, columnas, clave):
+    """
+    Muestra una tabla de a FILAS_POR_PAGINA filas con un solo st.dataframe.
+      - nombres_columnas: lista con el título de cada columna
+      - columnas        : lista con los valores de cada columna (listas o arreglos del mismo largo)
+      - clave           : nombre único para el selector de página
+    Solo se recorta (en el servidor) y se envía la página elegida.
+    """
+    n_filas = len(columnas[0])
+    n_paginas = max(1, (n_filas + FILAS_POR_PAGINA - 1) // FILAS_POR_PAGINA)
+    pagina_actual = 1
+    if n_paginas > 1:
+        pagina_actual = st.number_input(
+            "Página (de " + str(n_paginas) + ")", min_value=1, max_value=n_paginas, value=1, key=clave
+        )
+    inicio = (pagina_actual - 1) * FILAS_POR_PAGINA
+    fin = min(n_filas, inicio + FILAS_POR_PAGINA)
+
+    # Numeramos las filas desde 1, como en el resto de la demo
+    tabla = pd.DataFrame(index=range(inicio + 1, fin + 1))
+    for j in range(len(nombres_columnas)):
+        tabla[nombres_columnas[j]] = columnas[j][inicio:fin]
+    st.dataframe(tabla, use_container_width=True)
+    st.caption("Filas " + str(inicio + 1) + " a " + str(fin) + " de " + str(n_filas))
+
+
+# --- Caché de datos ---
+# La misma caché que usa main.py (ver cache_datos.py): tiene un presupuesto de
+# bytes, entrega a todas las sesiones el mismo resultado (con los arreglos de
+# solo lectura, sin copiarlo) y cuenta aciertos y fallos.
+CACHE = cache_global()
+
+
 # --- Función para cargar datos del CSV ---
-@st.cache_data
-def cargar_datos(path_csv):
+def cargar_datos(path_csv, firma, ponderaciones, promedio_minimo=0):
     """
-    Lee un archivo CSV muy simple y devuelve:
+    Recorre el CSV por lotes (ver leer_en_lotes), o lee el archivo Parquet / Arrow
+    (ver cargar_columnar), y devuelve solo los alumnos con promedio simple
+    >= 'promedio_minimo':
       - encabezados: lista de cadenas con los nombres de columnas
-      - filas   : lista de filas, donde cada fila es a su vez una lista de cadenas
+      - muestra    : 5 filas para mostrar; en un CSV, las primeras tal como vienen
+                     en el archivo (sin filtrar); en Parquet / Arrow, las primeras
+                     que cumplen el filtro
+      - nombres    : lista con el nombre de cada alumno
+      - notas      : arreglo de NumPy (alumnos x 4) con las notas, NaN si la celda no era válida
+      - promedios  : arreglo de NumPy (alumnos x 2) con el promedio simple y el ponderado
     Ejemplo de retorno:
       encabezados = ["nombre", "pep1", "pep2", "control1", "control2"]
-      filas = [
-        ["Ana Pérez", "75", "82", "78", "85"],
-        ["Juan Soto", "88", "91", "84", "90"],
-        ...
-      ]
+      muestra = [["Ana Pérez", "  75", "  82", "  78", "  85"], ...]
+      nombres = ["Ana Pérez", "Juan Soto", ...]
+      notas = [[75, 82, 78, 85], [88, 91, 84, 90], ...]
+      promedios = [[80.0, 79.6], [88.25, 88.5], ...]
+    Un CSV se lee y se guarda en caché completo, y el filtro se aplica sobre lo
+    guardado: mover el control del promedio mínimo no vuelve a leer el archivo
+    ni guarda una copia por cada valor. En Parquet / Arrow el filtro se empuja
+    a la lectura (solo se leen las filas que lo cumplen), y se guarda en caché
+    el resultado de cada valor del filtro.
     """
-    filas = []  # Lista vacía donde guardaremos cada fila leída del CSV
+    if formato_de(path_csv) != "csv":
+        return cargar_columnar_filtrado(path_csv, firma, ponderaciones, promedio_minimo)
+    encabezados, muestra, nombres, notas, promedios = cargar_csv(path_csv, firma, ponderaciones)
+    return filtrar_por_promedio(encabezados, muestra, nombres, notas, promedios, promedio_minimo)
+
+
+# Los argumentos son la clave de la caché: 'firma' (fecha de modificación y
+# tamaño del archivo) cambia si el archivo cambia, y así se vuelve a leer.
+@CACHE.memoizar
+def cargar_csv(path_csv, firma, ponderaciones):
+    """
+    Todos los alumnos del CSV, como cargar_datos sin filtro. Todo queda en caché:
+    las páginas de gráficos reutilizan estos promedios en vez de volver a
+    calcularlos. Los lotes solo acotan el texto que se convierte a la vez;
+    nombres, notas y promedios ocupan memoria por cada alumno.
+    """
+    muestra = []
     with open(path_csv, "r", encoding="utf-8") as f:
-        lector = csv.reader(f)       # Crea un objeto lector de CSV
-        encabezados = next(lector)   # Lee la primera línea como encabezados
-        # Recorre cada línea restante y la agrega a 'filas'
+        lector = csv.reader(f)
+        encabezados = next(lector)   # La primera línea son los encabezados
         for fila in lector:
-            filas.append(fila)
-    return encabezados, filas
+            if len(muestra) == 5:
+                break
+            muestra.append(fila)
+
+    nombres = []
+    notas_por_lote = []
+    for lote in leer_en_lotes(path_csv, FILAS_POR_LOTE):
+        nombres.extend(lote[0])
+        notas_por_lote.append(lote[1])
+    if len(notas_por_lote) > 0:
+        notas = np.concatenate(notas_por_lote)
+    else:
+        notas = np.zeros((0, 4))
+    promedios = calcular_promedios(notas, ponderaciones)
+    return encabezados, muestra, nombres, notas, promedios
+
+
+@CACHE.memoizar
+def cargar_columnar_filtrado(path, firma, ponderaciones, promedio_minimo):
+    """Los alumnos de un Parquet / Arrow con promedio >= 'promedio_minimo', como cargar_datos."""
+    encabezados, muestra, nombres, notas = cargar_columnar(path, promedio_minimo)
+    promedios = calcular_promedios(notas, ponderaciones)
+    return filtrar_por_promedio(encabezados, muestra, nombres, notas, promedios, promedio_minimo)
+
+
+def cargar_columnar(path, promedio_minimo):
+    """
+    Lee un archivo Parquet o Arrow IPC: solo las columnas nombre y notas
+    (proyección) y, si el archivo tiene la columna promedio, solo las filas con
+    promedio >= 'promedio_minimo' (en Parquet se saltan grupos enteros de filas
+    gracias a sus estadísticas). Devuelve encabezados, muestra, nombres y notas
+    como el resto de cargar_datos.
+    """
+    encabezados = ["nombre", "pep1", "pep2", "control1", "control2"]
+    tabla = leer_columnar(path, encabezados, promedio_minimo)
+    muestra = tabla.head(5).astype(str).values.tolist()
+    nombres = tabla["nombre"].tolist()
+    notas = tabla[encabezados[1:]].to_numpy(dtype=float)
+    return encabezados, muestra, nombres, notas
+
+
+def filtrar_por_promedio(encabezados, muestra, nombres, notas, promedios, promedio_minimo):
+    """Deja solo los alumnos con promedio simple >= 'promedio_minimo' (0 = todos)."""
+    if promedio_minimo <= 0:
+        return encabezados, muestra, nombres, notas, promedios
+    elegidos = np.flatnonzero(promedios[:, 0] >= promedio_minimo)
+    nombres = np.array(nombres, dtype=object)[elegidos].tolist()
+    return encabezados, muestra, nombres, notas[elegidos], promedios[elegidos]
+
+# --- Elegir el archivo de datos ---
+# datos_alumnos.csv tiene 5 alumnos; datos_alumnos_faker.csv (ver demo_faker.py) tiene 500
+# También se ofrecen los archivos Parquet / Arrow, si ya se generaron
+archivos = ["datos_alumnos.csv", "datos_alumnos_faker.csv"]
+for nombre_archivo in ["datos_alumnos_faker", "datos_alumnos_ordenado"]:
+    for extension in [".parquet", ".arrow"]:
+        if os.path.exists(nombre_archivo + extension):
+            archivos.append(nombre_archivo + extension)
+ruta_archivo = st.sidebar.selectbox("Archivo de datos:", archivos)
+# Solo los alumnos con promedio simple mayor o igual a este valor (0 = todos)
+promedio_minimo = st.sidebar.slider("Promedio mínimo:", 0, 100, 0)
+# El mismo promedio se usa en los tres gráficos
+tipo_promedio = st.sidebar.radio("Promedio a graficar:", ["Simple", "Ponderado"])
 
 # --- Intentamos cargar el CSV con los datos de los alumnos ---
-ruta_archivo = "datos_alumnos.csv"  # Nombre del CSV que creamos arriba
-enc, datos = [], []
+encabezados, muestra, nombres = [], [], []
+notas = np.zeros((0, 4))
+promedios_ambos = np.zeros((0, 2))
 
 # Capturamos errores si el archivo no existe o algo falla
 try:
-    encabezados, datos = cargar_datos(ruta_archivo)
+    encabezados, muestra, nombres, notas, promedios_ambos = cargar_datos(
+        ruta_archivo, firma_archivo(ruta_archivo), tuple(PONDERACIONES), promedio_minimo
+    )
 except Exception as e:
     st.error("Error al leer el CSV: " + str(e))
 
+# Aciertos, fallos y bytes usados por la caché de datos
+with st.sidebar.expander("Caché de datos"):
+    st.json(CACHE.estadisticas())
+
+# 'promedios' es la columna elegida (0 = simple, 1 = ponderado)
+if tipo_promedio == "Simple":
+    promedios = promedios_ambos[:, 0]
+else:
+    promedios = promedios_ambos[:, 1]
+
 # ------------------------------------------------------------------------
 # 1) PÁGINA: "Cargar datos"
 # ------------------------------------------------------------------------
@@ -145,7 +378,7 @@ with open("datos_alumnos.csv", "r", encoding="utf-8") as f:
     st.code(codigo_ejemplo, language="python")
 
     # Ahora, en la app misma, mostramos lo que cargamos:
-    if encabezados and datos:
+    if encabezados and muestra:
         st.subheader("Encabezados leídos:")
         # Concatenamos todos los encabezados en una única cadena
         linea_encabezados = ""
@@ -158,20 +391,18 @@ with open("datos_alumnos.csv", "r", encoding="utf-8") as f:
         st.write(linea_encabezados)
 
         st.subheader("Primeras 5 filas de datos (datos crudos):")
-        # Mostrar solo las primeras 5 filas para no saturar la pantalla
-        for i in range(len(datos)):
-            if i < 5:
-                fila = datos[i]
-                # Convertimos la lista de esa fila en una sola cadena para imprimir
-                texto_fila = ""
-                for j in range(len(fila)):
-                    if texto_fila == "":
-                        texto_fila = fila[j]
-                    else:
-                        texto_fila = texto_fila + ", " + fila[j]
-                st.write(str(i + 1) + ". " + texto_fila)
-            else:
-                break
+        # Una sola tabla con las primeras filas, tal como vienen en el archivo
+        # ('muestra' ya trae solo esas filas: el resto del archivo se leyó por lotes)
+        tabla_muestra = pd.DataFrame(muestra, columns=encabezados, index=range(1, len(muestra) + 1))
+        st.dataframe(tabla_muestra, use_container_width=True)
+
+        st.subheader("Todas las notas (ya convertidas a números):")
+        # Tabla paginada: se envía una página a la vez (las celdas inválidas aparecen vacías)
+        mostrar_tabla_paginada(
+            encabezados,
+            [nombres, notas[:, 0], notas[:, 1], notas[:, 2], notas[:, 3]],
+            "pagina_notas"
+        )
     else:
         st.write("No se pudo leer el archivo CSV o está vacío.")
 
@@ -221,30 +452,19 @@ for fila in datos:
     st.subheader("Fragmento de código para calcular promedios")
     st.code(codigo_calcular_promedios, language="python")
 
-    # --- Ahora ejecutamos el cálculo dentro de la app ---
-    promedios = []  # Inicializamos lista vacía
-    # Recorremos cada fila en 'datos'
-    for fila in datos:
-        try:
-            nota1 = int(fila[1])
-            nota2 = int(fila[2])
-            nota3 = int(fila[3])
-            nota4 = int(fila[4])
-            suma_notas = nota1 + nota2 + nota3 + nota4
-            promedio_ind = suma_notas / 4
-        except:
-            # Si alguna conversión falla, ponemos promedio 0
-            promedio_ind = 0
-        promedios.append(promedio_ind)
+    # --- En la app, 'promedios' ya viene calculado (y en caché) por cargar_datos ---
+    # Se calcula para todos los alumnos a la vez con NumPy (ver calcular_promedios).
+    # A diferencia del fragmento, una nota inválida no deja el promedio en 0:
+    # simplemente no se cuenta.
+    st.info(
+        "En la app los promedios se calculan con NumPy para todos los alumnos a la vez. "
+        "Las notas vacías o inválidas no se cuentan (en vez de dejar el promedio en 0)."
+    )
 
     # Mostrar los promedios junto a los nombres para mayor claridad
     st.subheader("Promedios calculados por alumno:")
-    for idx in range(len(datos)):
-        nombre = datos[idx][0]              # Columna 0 = nombre del alumno
-        prom = promedios[idx]               # Promedio calculado correspondiente
-        # Concatenamos en una cadena para mostrar: "Ana Pérez: 80.0"
-        linea = nombre + ": " + str(round(prom, 2))
-        st.write(linea)
+    # Una sola tabla paginada en vez de un st.write por alumno
+    mostrar_tabla_paginada(["nombre", "promedio"], [nombres, np.round(promedios, 2)], "pagina_promedios")
 
     # --- Finalmente: mostrar el gráfico de barras ---
     st.subheader("Gráfico de barras verticales con `st.bar_chart`")
@@ -290,18 +510,10 @@ for fila in datos:
 '''
     st.code(codigo_recalcular, language="python")
 
-    # Ejecutamos el cálculo nuevamente
-    promedios = []
-    for fila in datos:
-        try:
-            nota1 = int(fila[1]); nota2 = int(fila[2])
-            nota3 = int(fila[3]); nota4 = int(fila[4])
-            prom = (nota1 + nota2 + nota3 + nota4) / 4
-        except:
-            prom = 0
-        promedios.append(prom)
-
-    st.write("Promedios disponibles:", promedios)
+    # En la app reutilizamos los promedios que ya calculó cargar_datos (están en caché)
+    # y los mostramos de a una página, igual que en la sección anterior
+    st.write("Promedios disponibles:")
+    mostrar_tabla_paginada(["nombre", "promedio"], [nombres, np.round(promedios, 2)], "pagina_promedios_lineas")
 
     # Mostrar fragmento de código para la línea
     st.subheader("Fragmento de código para `st.line_chart`")
@@ -340,17 +552,10 @@ for fila in datos:
 '''
     st.code(codigo_recalcular2, language="python")
 
-    promedios = []
-    for fila in datos:
-        try:
-            nota1 = int(fila[1]); nota2 = int(fila[2])
-            nota3 = int(fila[3]); nota4 = int(fila[4])
-            prom = (nota1 + nota2 + nota3 + nota4) / 4
-        except:
-            prom = 0
-        promedios.append(prom)
-
-    st.write("Promedios calculados:", promedios)
+    # En la app reutilizamos los promedios que ya calculó cargar_datos (están en caché)
+    # y los mostramos de a una página, igual que en la sección anterior
+    st.write("Promedios calculados:")
+    mostrar_tabla_paginada(["nombre", "promedio"], [nombres, np.round(promedios, 2)], "pagina_promedios_area")
 
     # Mostrar fragmento de código para área
     st.subheader("Fragmento de código para `st.area_chart`")
@@ -416,15 +621,27 @@ for cad in lista_cadenas:
         "  4. Siempre agregamos `num` (sea la conversión real o el 0 por defecto) a `notas_convertidas`."
     )
 
-    st.subheader("¿Por qué lo usamos en esta demo?")
+    st.subheader("¿Dónde lo usamos en esta demo?")
     st.write(
         "- Al leer el CSV, algunas celdas pueden estar vacías o contener texto que no sea número.  \n"
         "- Si hacemos `int(fila[i])` sin protección y la celda no es un número válido, el programa se detendrá con un `ValueError`.  \n"
-        "- Entonces envolvemos esa conversión en `try/except` para:  \n"
+        "- En los fragmentos de las otras secciones envolvemos esa conversión en `try/except` para:  \n"
         "    1. Capturar el error.  \n"
         "    2. Asignar un valor seguro (por ejemplo, 0) cuando falle.  \n"
         "    3. Continuar ejecutando el dashboard sin que se rompa.  \n\n"
-        "De esta forma garantizamos que todos los promedios o gráficos se calculen incluso si hay datos sucios o celdas vacías."
+        "La app, por dentro, usa `try/except` solo al cargar el archivo: si no existe o no se puede leer, "
+        "muestra un mensaje de error en vez de detenerse."
+    )
+
+    st.subheader("¿Y las notas inválidas?")
+    st.write(
+        "Con muchos alumnos, un `try/except` por celda es lento. Por eso la app convierte "
+        "todas las notas de un lote de una vez con NumPy y **sin** `try/except`:  \n"
+        "    1. Revisa qué celdas son solo dígitos (`np.char.isdigit`).  \n"
+        "    2. Convierte esas celdas a número.  \n"
+        "    3. Deja las demás como `NaN` (\"no es un número\").  \n\n"
+        "Una nota `NaN` no cuenta en el promedio (en vez de contar como 0), así que los "
+        "promedios y gráficos se calculan igual aunque haya datos sucios o celdas vacías."
     )
 
 
@@ -0,0 +1,163 @@
+# estadisticas.py
+
+"""
+Estadísticas descriptivas en una sola pasada.
+
+- EstadisticasEnLinea: acumula conteo, media, varianza (algoritmo de Welford,
+  combinando lotes con la fórmula de Chan), mínimo, máximo y percentiles
+  aproximados (ResumenCuantiles) lote a lote. Nunca guarda los datos, así que
+  sirve para archivos que no caben en memoria.
+- describir(valores): para columnas que ya están en memoria; igual que arriba,
+  pero con percentiles exactos por selección (np.percentile usa np.partition,
+  O(n), sin ordenar todo el arreglo).
+"""
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Percentiles que se calculan por defecto (el 50 es la mediana)
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+@dataclass
+class Descripcion:
+    """Resultado de describir una columna. La desviación es la poblacional (divide por n)."""
+    n: int
+    media: float
+    desviacion: float
+    minimo: float
+    maximo: float
+    percentiles: dict = field(default_factory=dict)
+
+    @property
+    def mediana(self):
+        return self.percentiles.get(50, math.nan)
+
+
+class ResumenCuantiles:
+    """
+    Resumen de cuantiles de memoria acotada que se actualiza por lotes con NumPy.
+
+    Guarda a lo más 2 x 'capacidad' puntos (valor, peso): cada lote se ordena y,
+    si es más grande que 'capacidad', se reemplaza por 'capacidad' valores
+    equiespaciados en rango, cada uno con el peso de las filas que representa.
+    Cuando los puntos acumulados pasan de 2 x 'capacidad' se comprimen de la
+    misma forma. El error en rango de cada compresión es a lo más total / (2 x
+    capacidad) filas. Mientras no se comprime nada (pocos valores) los
+    percentiles son exactos.
+    """
+
+    def __init__(self, capacidad=4096):
+        self.capacidad = capacidad
+        self._valores = np.zeros(0)
+        self._pesos = np.zeros(0)
+        self._exacto = True
+
+    @staticmethod
+    def _comprimir(valores, pesos, m):
+        # 'valores' ordenados: m puntos en los rangos (j + 0.5) * total / m
+        acumulado = np.cumsum(pesos)
+        objetivos = (np.arange(m) + 0.5) * (acumulado[-1] / m)
+        posiciones = np.minimum(np.searchsorted(acumulado, objetivos), len(valores) - 1)
+        return valores[posiciones], np.full(m, acumulado[-1] / m)
+
+    def agregar_lote(self, valores):
+        valores = np.sort(np.asarray(valores, dtype=np.float64))
+        if len(valores) == 0:
+            return
+        pesos = np.ones(len(valores))
+        if len(valores) > self.capacidad:
+            valores, pesos = self._comprimir(valores, pesos, self.capacidad)
+            self._exacto = False
+        self._valores = np.concatenate((self._valores, valores))
+        self._pesos = np.concatenate((self._pesos, pesos))
+        if len(self._valores) > 2 * self.capacidad:
+            orden = np.argsort(self._valores, kind="stable")
+            self._valores, self._pesos = self._comprimir(self._valores[orden], self._pesos[orden], self.capacidad)
+            self._exacto = False
+
+    def cuantiles(self, probabilidades):
+        """Cuantiles aproximados (probabilidades entre 0 y 1); NaN si no hay datos."""
+        probabilidades = np.asarray(probabilidades, dtype=np.float64)
+        if len(self._valores) == 0:
+            return np.full(len(probabilidades), math.nan)
+        if self._exacto:
+            return np.percentile(self._valores, probabilidades * 100)
+        orden = np.argsort(self._valores, kind="stable")
+        valores = self._valores[orden]
+        pesos = self._pesos[orden]
+        # Cada punto representa el centro de su peso en el rango acumulado
+        centros = np.cumsum(pesos) - pesos / 2
+        return np.interp(probabilidades * pesos.sum(), centros, valores)
+
+
+class EstadisticasEnLinea:
+    """
+    Acumulador de una sola pasada. Cada lote se resume con NumPy (conteo, media
+    y suma de cuadrados de las desviaciones) y se combina con lo acumulado:
+
+        delta = media_lote - media
+        m2    = m2 + m2_lote + delta^2 * n * n_lote / (n + n_lote)
+
+    que es la versión por lotes del algoritmo de Welford y no pierde precisión
+    al restar números grandes como lo haría sum(x^2) - n * media^2.
+    """
+
+    def __init__(self, percentiles=PERCENTILES):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.percentiles = tuple(percentiles)
+        self._cuantiles = ResumenCuantiles() if self.percentiles else None
+
+    def agregar(self, lote):
+        lote = np.asarray(lote, dtype=np.float64)
+        if len(lote) == 0:
+            return
+        n_lote = len(lote)
+        media_lote = float(lote.mean())
+        m2_lote = float(np.square(lote - media_lote).sum())
+
+        total = self.n + n_lote
+        delta = media_lote - self.media
+        self.media += delta * n_lote / total
+        self.m2 += m2_lote + delta * delta * self.n * n_lote / total
+        self.n = total
+        self.minimo = min(self.minimo, float(lote.min()))
+        self.maximo = max(self.maximo, float(lote.max()))
+
+        if self._cuantiles is not None:
+            self._cuantiles.agregar_lote(lote)
+
+    def resultado(self):
+        if self.n == 0:
+            return Descripcion(0, math.nan, math.nan, math.nan, math.nan)
+        percentiles = {}
+        if self._cuantiles is not None:
+            valores = self._cuantiles.cuantiles(np.asarray(self.percentiles) / 100)
+            for p, v in zip(self.percentiles, valores.tolist()):
+                percentiles[p] = v
+        return Descripcion(
+            n=self.n,
+            media=self.media,
+            desviacion=math.sqrt(self.m2 / self.n),
+            minimo=self.minimo,
+            maximo=self.maximo,
+            percentiles=percentiles,
+        )
+
+
+def describir(valores, percentiles=PERCENTILES):
+    """Describe un arreglo que ya está en memoria, con percentiles exactos."""
+    acumulador = EstadisticasEnLinea(percentiles=())
+    acumulador.agregar(valores)
+    descripcion = acumulador.resultado()
+    if descripcion.n:
+        exactos = np.percentile(np.asarray(valores, dtype=np.float64), percentiles)
+        for p, v in zip(percentiles, exactos.tolist()):
+            descripcion.percentiles[p] = v
+    return descripcion
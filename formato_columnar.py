@@ -0,0 +1,141 @@
+# formato_columnar.py
+
+"""
+Archivos columnares (Parquet o Arrow IPC) para las listas de alumnos.
+
+Un CSV hay que volver a leerlo y convertirlo entero cada vez que se usa. En un
+archivo columnar cada columna se guarda aparte, ya con su tipo y comprimida
+(zstd), en grupos de FILAS_POR_GRUPO filas:
+  - Parquet guarda además el mínimo y el máximo de cada columna en cada grupo
+    (estadísticas), así que un filtro como "promedio >= 85" se salta los grupos
+    que no pueden cumplirlo sin descomprimirlos (predicate pushdown).
+  - Arrow IPC (.arrow) es el formato de memoria de Arrow tal cual: no tiene
+    estadísticas, pero se lee sin convertir nada.
+En ambos se leen solo las columnas pedidas (proyección).
+
+El formato se deduce de la extensión del archivo (ver EXTENSIONES).
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Formatos de salida de los scripts y la extensión de cada uno
+EXTENSIONES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+FILAS_POR_GRUPO = 64_000
+COMPRESION = "zstd"
+
+
+def formato_de(path):
+    """Formato ("csv", "parquet" o "arrow") según la extensión de 'path'."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".arrow", ".feather", ".ipc"):
+        return "arrow"
+    if extension == ".parquet":
+        return "parquet"
+    return "csv"
+
+
+def con_formato(path, formato):
+    """'path' con la extensión del formato: con_formato("a.csv", "parquet") -> "a.parquet"."""
+    return os.path.splitext(path)[0] + EXTENSIONES[formato]
+
+
+def _a_tabla(df):
+    # Las columnas category pasan a texto: cada trozo tendría su propio diccionario
+    categorias = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if categorias:
+        df = df.astype({c: str for c in categorias})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+class EscritorColumnar:
+    """
+    Escribe un archivo Parquet o Arrow IPC por trozos (DataFrames con las mismas
+    columnas), sin tener el archivo completo en memoria. Se usa con 'with':
+
+        with EscritorColumnar("alumnos.parquet") as escritor:
+            for trozo in trozos:
+                escritor.escribir(trozo)
+    """
+
+    def __init__(self, salida, formato=None, filas_por_grupo=FILAS_POR_GRUPO):
+        self.salida = salida
+        self.formato = formato or formato_de(salida)
+        self.filas_por_grupo = filas_por_grupo
+        self.esquema = None
+        self._escritor = None
+
+    def escribir(self, df):
+        tabla = _a_tabla(df)
+        if self._escritor is None:
+            # El primer trozo fija el esquema; los siguientes se convierten a él
+            self.esquema = tabla.schema.remove_metadata()
+            if self.formato == "parquet":
+                self._escritor = pq.ParquetWriter(
+                    self.salida, self.esquema, compression=COMPRESION, write_statistics=True
+                )
+            else:
+                opciones = pa.ipc.IpcWriteOptions(compression=COMPRESION)
+                self._escritor = pa.ipc.new_file(self.salida, self.esquema, options=opciones)
+        tabla = tabla.replace_schema_metadata(None).cast(self.esquema)
+        if self.formato == "parquet":
+            self._escritor.write_table(tabla, row_group_size=self.filas_por_grupo)
+        else:
+            self._escritor.write_table(tabla, max_chunksize=self.filas_por_grupo)
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def escribir_tabla(df, salida, formato=None, filas_por_grupo=FILAS_POR_GRUPO):
+    """Guarda 'df' en 'salida' (CSV, Parquet o Arrow IPC según 'formato' o la extensión)."""
+    formato = formato or formato_de(salida)
+    if formato == "csv":
+        df.to_csv(salida, index=False)
+        return
+    with EscritorColumnar(salida, formato, filas_por_grupo) as escritor:
+        escritor.escribir(df)
+
+
+def csv_a_columnar(entrada, salida, formato=None, filas_por_grupo=FILAS_POR_GRUPO, dtype=None):
+    """
+    Convierte un CSV (de cualquier tamaño) a Parquet o Arrow IPC, de a un grupo
+    de filas a la vez. 'dtype' son los tipos de las columnas, como en pd.read_csv.
+    """
+    with EscritorColumnar(salida, formato, filas_por_grupo) as escritor:
+        for trozo in pd.read_csv(entrada, chunksize=filas_por_grupo, dtype=dtype):
+            escritor.escribir(trozo)
+
+
+def _dataset(path):
+    return ds.dataset(path, format="parquet" if formato_de(path) == "parquet" else "ipc")
+
+
+def leer_columnar(path, columnas=None, promedio_minimo=None):
+    """
+    Lee un archivo Parquet o Arrow IPC como DataFrame.
+    - columnas        : solo estas columnas (las que no estén en el archivo se ignoran)
+    - promedio_minimo : solo las filas con promedio >= este valor, si el archivo
+                        tiene la columna "promedio" (en Parquet se saltan los
+                        grupos de filas cuyo máximo es menor)
+    """
+    dataset = _dataset(path)
+    if columnas is not None:
+        columnas = [c for c in columnas if c in dataset.schema.names]
+    filtro = None
+    if promedio_minimo is not None and "promedio" in dataset.schema.names:
+        filtro = ds.field("promedio") >= promedio_minimo
+    return dataset.to_table(columns=columnas, filter=filtro).to_pandas()
@@ -0,0 +1,169 @@
+# graficos.py
+
+"""
+Preparación de datos para los gráficos de Vega-Lite del lado del servidor.
+
+La idea es que al navegador se envíe solo lo que se va a dibujar (por ejemplo,
+los bordes y frecuencias de un histograma) y no una fila por video, de modo que
+el tamaño del mensaje no crezca con el dataset.
+"""
+
+import numpy as np
+
+from agrupar import agrupar
+
+
+def histograma(valores, n_bins=20, escala_log=False, pesos=None, rango=None):
+    """
+    Agrupa 'valores' en 'n_bins' intervalos y devuelve una lista de diccionarios
+    {"desde", "hasta", "frecuencia"}, uno por intervalo. Con 'pesos', cada valor
+    cuenta tantas veces como su peso; 'rango' = (mínimo, máximo) fija los extremos.
+
+    Con escala_log=True los bordes se reparten uniformemente en log10(valor + 1),
+    lo que sirve para distribuciones con cola larga como las vistas.
+    """
+    valores = np.asarray(valores)
+    if len(valores) == 0:
+        return []
+    if rango is None:
+        rango = (valores.min(), valores.max())
+    minimo = float(rango[0])
+    maximo = float(rango[1])
+    if escala_log and minimo >= 0:
+        exponentes = np.linspace(np.log10(minimo + 1), np.log10(maximo + 1), n_bins + 1)
+        bordes = np.power(10.0, exponentes) - 1
+    else:
+        bordes = np.linspace(minimo, maximo, n_bins + 1)
+    if maximo == minimo:
+        bordes = np.array([minimo, minimo + 1.0])
+
+    frecuencias, bordes = np.histogram(valores, bins=bordes, weights=pesos)
+    salida = []
+    for desde, hasta, frecuencia in zip(bordes[:-1].tolist(), bordes[1:].tolist(), frecuencias.tolist()):
+        salida.append({"desde": round(desde, 2), "hasta": round(hasta, 2), "frecuencia": int(frecuencia)})
+    return salida
+
+
+def reducir_puntos(valores, max_puntos=1000):
+    """
+    Elige a lo más 'max_puntos' índices de una serie para graficarla sin perder
+    los picos: la serie se divide en (max_puntos - 2) / 2 tramos consecutivos y de cada
+    tramo se conservan la posición del mínimo y la del máximo (método min/max por
+    tramo). Devuelve los índices elegidos en orden creciente.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    n = len(valores)
+    if n <= max_puntos:
+        return np.arange(n)
+
+    n_tramos = max(1, (max_puntos - 2) // 2)
+    tamano = -(-n // n_tramos)  # división entera hacia arriba
+    n_tramos = -(-n // tamano)
+
+    # Rellenamos con NaN para formar una matriz (tramos x tamaño) y buscar por fila
+    relleno = np.full(n_tramos * tamano, np.nan)
+    relleno[:n] = valores
+    matriz = relleno.reshape(n_tramos, tamano)
+    base = np.arange(n_tramos) * tamano
+    minimos = base + np.nanargmin(matriz, axis=1)
+    maximos = base + np.nanargmax(matriz, axis=1)
+
+    # Siempre conservamos el primer y el último punto de la serie
+    return np.unique(np.concatenate(([0, n - 1], minimos, maximos)))
+
+
+# Periodos para remuestrear series de tiempo: etiqueta en la UI -> código
+PERIODOS = {"Día": "D", "Semana": "W", "Mes": "M"}
+
+
+def inicio_periodo(fechas, periodo):
+    """
+    Lleva cada fecha al inicio de su periodo ("D" día, "W" semana que empieza
+    el lunes, "M" mes) y devuelve datetime64[D].
+    """
+    dias = fechas.astype("datetime64[D]")
+    if periodo == "D":
+        return dias
+    if periodo == "W":
+        # El 1970-01-01 fue jueves: (días + 3) % 7 es 0 los lunes
+        return dias - ((dias.astype(np.int64) + 3) % 7)
+    if periodo == "M":
+        return fechas.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError("Periodo desconocido: " + str(periodo))
+
+
+def remuestrear(fechas, valores, periodo, agregado="suma"):
+    """
+    Agrupa una serie por día, semana o mes y devuelve una lista de diccionarios
+    {"fecha": "AAAA-MM-DD", "valor": ...} lista para Vega-Lite.
+    'agregado' puede ser "suma", "media" o "conteo".
+    """
+    if len(fechas) == 0:
+        return []
+    grupos = agrupar(inicio_periodo(fechas, periodo), valores)
+    resultado = grupos.conteo if agregado == "conteo" else getattr(grupos, agregado)
+    salida = []
+    for fecha, valor in zip(np.datetime_as_string(np.array(grupos.claves, dtype="datetime64[D]")), resultado.tolist()):
+        salida.append({"fecha": str(fecha), "valor": round(valor, 2)})
+    return salida
+
+
+class HistogramaEnLinea:
+    """
+    Histograma que se llena por lotes sin guardar los valores: cuenta cada valor
+    en una grilla fina y fija en escala log10(valor + 1) (RESOLUCION décadas por
+    casilla). Al final se reagrupa en la cantidad de intervalos pedida; cada
+    casilla fina cae entera en el intervalo que contiene su centro, así que los
+    bordes son aproximados (error menor al 1,2% del valor con la resolución por defecto).
+    Solo admite valores >= 0, como las vistas.
+    """
+
+    RESOLUCION = 0.005
+
+    def __init__(self, decadas=13):
+        self.conteos = np.zeros(int(decadas / self.RESOLUCION) + 1, dtype=np.int64)
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    def agregar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        if len(valores) == 0:
+            return
+        casillas = np.floor(np.log10(valores + 1) / self.RESOLUCION).astype(np.int64)
+        np.clip(casillas, 0, len(self.conteos) - 1, out=casillas)
+        self.conteos += np.bincount(casillas, minlength=len(self.conteos))
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+    def histograma(self, n_bins=20, escala_log=False):
+        """Mismo formato que histograma(): lista de {"desde", "hasta", "frecuencia"}."""
+        if not self.conteos.any():
+            return []
+        usadas = np.flatnonzero(self.conteos)
+        centros = np.power(10.0, (usadas + 0.5) * self.RESOLUCION) - 1
+        # Los centros se recortan al rango observado para que los extremos queden dentro
+        centros = np.clip(centros, self.minimo, self.maximo)
+        return histograma(centros, n_bins, escala_log, pesos=self.conteos[usadas], rango=(self.minimo, self.maximo))
+
+
+def remuestrear_totales(dias, conteos, sumas, periodo, agregado="suma"):
+    """
+    Como remuestrear(), pero a partir de totales diarios ya agregados (por
+    ejemplo, los que produce la lectura por lotes): 'conteos' es la cantidad de
+    videos de cada día y 'sumas' la suma de la métrica ese día.
+    """
+    if len(dias) == 0:
+        return []
+    periodos = inicio_periodo(dias, periodo)
+    por_conteo = agrupar(periodos, conteos)
+    por_suma = agrupar(periodos, sumas)
+    if agregado == "conteo":
+        resultado = por_conteo.suma
+    elif agregado == "media":
+        resultado = por_suma.suma / np.maximum(por_conteo.suma, 1)
+    else:
+        resultado = por_suma.suma
+    salida = []
+    for fecha, valor in zip(np.datetime_as_string(np.array(por_suma.claves, dtype="datetime64[D]")), resultado.tolist()):
+        salida.append({"fecha": str(fecha), "valor": round(valor, 2)})
+    return salida
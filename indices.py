@@ -0,0 +1,76 @@
+# indices.py
+
+"""
+Índices sobre la TablaYT que se construyen una vez por carga y quedan en caché.
+
+- IndiceTemporal: las filas ordenadas por fecha de publicación. Un filtro por
+  rango de fechas se resuelve con búsqueda binaria (np.searchsorted), así que
+  cuesta O(log n + k) en vez de recorrer todas las filas.
+- orden_por: permutación de las filas ordenadas por cualquier columna, para
+  paginar la tabla ordenada sin volver a ordenar en cada página.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class IndiceTemporal:
+    """
+    - orden : números de fila de la tabla, ordenados por fecha (sin las fechas NaT)
+    - fechas: las fechas en ese mismo orden (datetime64[s])
+    """
+    orden: np.ndarray
+    fechas: np.ndarray
+
+    def __len__(self):
+        return len(self.orden)
+
+    def posiciones(self, desde=None, hasta=None):
+        """
+        Devuelve (i, j) tal que fechas[i:j] son las fechas en [desde, hasta).
+        Ambos extremos son opcionales y se comparan como datetime64.
+        """
+        i = 0 if desde is None else int(np.searchsorted(self.fechas, np.datetime64(desde, "s"), side="left"))
+        j = len(self.fechas) if hasta is None else int(np.searchsorted(self.fechas, np.datetime64(hasta, "s"), side="left"))
+        return i, max(i, j)
+
+
+def indice_temporal(tabla, columna="publicado"):
+    """Ordena una vez las filas de la tabla por la columna de fecha 'columna'."""
+    fechas = tabla[columna]
+    filas = np.flatnonzero(~np.isnat(fechas))
+    orden = filas[np.argsort(fechas[filas], kind="stable")]
+    return IndiceTemporal(orden=orden, fechas=fechas[orden])
+
+
+def orden_por(tabla, columna, descendente=False):
+    """
+    Números de fila de la tabla ordenados por 'columna'. Las categóricas se
+    ordenan por su texto y el texto libre alfabéticamente. Las celdas inválidas
+    o vacías (fechas NaT, números mal formados, categorías faltantes) quedan
+    siempre al final, en orden de archivo.
+    """
+    valores = tabla[columna]
+    if columna in tabla.categorias:
+        # Rango alfabético de cada categoría; el código -1 (vacío) es inválido
+        categorias = np.asarray(tabla.categorias[columna], dtype=object)
+        rango = np.empty(len(categorias), dtype=np.int64)
+        rango[np.argsort(categorias, kind="stable")] = np.arange(len(categorias))
+        validas = valores >= 0
+        clave = np.where(validas, rango[np.maximum(valores, 0)], 0)
+    elif isinstance(valores, np.ndarray) and valores.dtype != object:
+        validas = tabla.validos(columna)
+        if np.issubdtype(valores.dtype, np.datetime64):
+            validas &= ~np.isnat(valores)
+        clave = valores
+    else:
+        clave = np.asarray(valores.tolist() if hasattr(valores, "tolist") else list(valores), dtype=object)
+        validas = clave != ""
+
+    filas = np.flatnonzero(validas)
+    orden = filas[np.argsort(clave[filas], kind="stable")]
+    if descendente:
+        orden = orden[::-1]
+    return np.concatenate((orden, np.flatnonzero(~validas)))
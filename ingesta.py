@@ -0,0 +1,499 @@
+# ingesta.py
+
+"""
+Ingesta incremental del CSV de YT-STATS.
+
+La exportación recibe filas nuevas al final del archivo todos los días, y un
+video ya existente puede volver a aparecer (con el mismo videoId) con sus
+métricas y su columna "actualizado" al día. En vez de volver a leer todo:
+
+  1) Se recuerda hasta qué byte del archivo ya se procesó (el final de la
+     última línea completa).
+  2) En cada actualización se leen solo los bytes nuevos y se parsean.
+  3) Cada fila nueva se inserta o reemplaza a la existente con el mismo
+     videoId (upsert; si el videoId aparece varias veces gana la última).
+  4) Los KPIs (conteos, sumas, subtotales por playlist y por ayudante) se
+     corrigen restando el aporte de las filas reemplazadas y sumando el de las
+     nuevas, sin recalcular todo el dataset. Los mínimos y máximos se recalculan
+     completos solo si se reemplazó justo el valor extremo.
+
+Cada versión publicada (la TablaYT que devuelve actualizar()) es inmutable:
+las columnas publicadas son vistas de los buffers internos, así que antes de
+reemplazar filas existentes se copia el buffer (copy-on-write). Las filas
+agregadas al final no se ven en las vistas ya publicadas y no obligan a copiar.
+
+Cada versión anota qué filas agregó o reemplazó (filas_cambiadas), para que
+los índices derivados de la tabla (búsqueda, filtros) se extiendan con solo
+esas filas en vez de armarse de cero.
+
+Si el archivo se acortó o cambió antes del punto ya leído (por ejemplo, se
+regeneró la exportación completa), se vuelve a cargar desde cero.
+Limitación: se asume que los campos entre comillas no contienen saltos de línea.
+"""
+
+import csv
+import io
+import itertools
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from agrupar import Grupos
+from datos_yt import (
+    COLUMNA_DURACION,
+    COLUMNAS_CATEGORICAS,
+    COLUMNAS_ENTERAS,
+    COLUMNAS_FECHA,
+    ColumnaTexto,
+    TablaYT,
+    convertir_columna,
+)
+from indices import IndiceTemporal, indice_temporal
+from metricas import METRICAS_RESUMEN, Resumen, calcular_resumen
+from snapshot import cargar_con_snapshot
+
+# Bytes anteriores al punto ya leído que se comparan para detectar que el archivo
+# no fue reescrito
+TAMANO_TESTIGO = 4096
+
+# Números de versión únicos en todo el proceso: aunque la ingesta se vuelva a
+# crear (por ejemplo, al salir de la caché), una versión nunca se repite
+_VERSIONES = itertools.count(1)
+
+# Memoria de un str vacío: un texto en memoria ocupa esto más (aprox.) un byte por carácter
+_BYTES_STR = sys.getsizeof("")
+
+
+def _fin_ultima_linea(path, tamano):
+    """Posición justo después del último salto de línea dentro de los primeros 'tamano' bytes."""
+    with open(path, "rb") as f:
+        fin = tamano
+        while fin > 0:
+            inicio = max(0, fin - 65536)
+            f.seek(inicio)
+            bloque = f.read(fin - inicio)
+            salto = bloque.rfind(b"\n")
+            if salto >= 0:
+                return inicio + salto + 1
+            fin = inicio
+    return 0
+
+
+class IngestaIncremental:
+    """
+    Mantiene la TablaYT de un CSV al día leyendo solo lo que se agrega al archivo.
+    Uso:
+        ingesta = IngestaIncremental(path)
+        tabla, resumen, indice_fechas = ingesta.actualizar()
+    Es seguro llamar a actualizar() desde varias sesiones a la vez.
+    """
+
+    # La caché usa 'nbytes' en vez de recorrer cada texto (ver cache_datos.tamano_en_bytes)
+    cuenta_sus_bytes = True
+
+    def __init__(self, path, directorio_snapshots=None):
+        self.path = path
+        self.directorio_snapshots = directorio_snapshots
+        self.version = 0  # cambia (a un número nunca usado) cada vez que cambian los datos
+        self._lock = threading.Lock()
+        self._recargar()
+
+    # ------------------------------------------------------------------
+    # Carga completa
+    # ------------------------------------------------------------------
+    def _recargar(self):
+        tamano = os.stat(self.path).st_size
+        tabla = cargar_con_snapshot(self.path, self.directorio_snapshots)
+
+        # Si el archivo ya traía videoId repetidos, nos quedamos con la última aparición
+        ids = tabla["videoId"].tolist()
+        fila_por_id = dict(zip(ids, range(len(ids))))
+        if len(fila_por_id) < len(ids):
+            filas = np.sort(np.fromiter(fila_por_id.values(), dtype=np.intp))
+            tabla = tabla.seleccionar(filas)
+            ids = tabla["videoId"].tolist()
+            fila_por_id = dict(zip(ids, range(len(ids))))
+
+        self.encabezados = tabla.encabezados
+        self.n = len(tabla)
+        self._buffers = dict(tabla.columnas)  # pueden ser memory-maps de solo lectura
+        # Buffers que la tabla publicada usa como columnas: no se escriben en el lugar
+        self._publicados = dict(self._buffers)
+        self._malas = {}
+        for nombre, filas in tabla.errores.items():
+            malas = np.zeros(self.n, dtype=bool)
+            malas[filas] = True
+            self._malas[nombre] = malas
+        self.categorias = {}
+        self._codigo_de = {}
+        for nombre, valores in tabla.categorias.items():
+            self.categorias[nombre] = list(valores)
+            self._codigo_de[nombre] = dict(zip(valores, range(len(valores))))
+        self._fila_por_id = fila_por_id
+        # Bytes de los str en memoria (claves de _fila_por_id y columnas de texto ya
+        # convertidas a objetos): se llevan sumados a medida que se agregan
+        self._bytes_textos = _bytes_textos(ids) + sum(
+            _bytes_textos(b) for b in self._buffers.values()
+            if isinstance(b, np.ndarray) and b.dtype == object
+        )
+
+        self._offset = _fin_ultima_linea(self.path, tamano)
+        self._tamano_visto = tamano
+        self._testigo = self._leer_testigo()
+
+        self._tabla = tabla
+        self._indice = indice_temporal(tabla)
+        self._reiniciar_kpis(calcular_resumen(tabla))
+        self.version = next(_VERSIONES)
+        # Versión de la carga completa y, por cada versión posterior, las filas que cambió
+        self._version_base = self.version
+        self._cambios = []
+
+    @property
+    def nbytes(self):
+        """
+        Memoria aproximada de la ingesta, sin recorrer cada texto: la capacidad de
+        los buffers y los índices (los memory-maps no cuentan) más los bytes de
+        texto sumados al cargar y en cada upsert.
+        """
+        total = self._bytes_textos + sys.getsizeof(self._fila_por_id)
+        total += sum(_bytes_buffer(b) for b in self._buffers.values())
+        total += sum(m.nbytes for m in self._malas.values())
+        total += sum(_bytes_textos(c) for c in self.categorias.values())
+        total += self._indice.orden.nbytes + self._indice.fechas.nbytes
+        total += sum(f.nbytes for _, f in self._cambios)
+        return total
+
+    def _leer_testigo(self):
+        with open(self.path, "rb") as f:
+            f.seek(max(0, self._offset - TAMANO_TESTIGO))
+            return f.read(min(self._offset, TAMANO_TESTIGO))
+
+    # ------------------------------------------------------------------
+    # KPIs mantenidos por diferencias
+    # ------------------------------------------------------------------
+    def _reiniciar_kpis(self, resumen):
+        """Toma como punto de partida un Resumen calculado desde cero."""
+        self._resumen = resumen
+        self._conteo = resumen.conteo.astype(np.int64)
+        self._suma = resumen.suma.astype(np.int64)
+        self._minimo = resumen.minimo.copy()
+        self._maximo = resumen.maximo.copy()
+        self._extremos_sucios = False
+
+        n_pl = len(self.categorias["playlist(s)"])
+        self._pl_conteo = np.zeros(n_pl, dtype=np.int64)
+        self._pl_suma = np.zeros((n_pl, len(METRICAS_RESUMEN)), dtype=np.int64)
+        self._pl_minimo = np.full(self._pl_suma.shape, np.nan)
+        self._pl_maximo = np.full(self._pl_suma.shape, np.nan)
+        posiciones = [self._codigo_de["playlist(s)"][c] for c in resumen.por_playlist.claves]
+        self._pl_conteo[posiciones] = resumen.por_playlist.conteo
+        self._pl_suma[posiciones] = resumen.por_playlist.suma
+        self._pl_minimo[posiciones] = resumen.por_playlist.minimo
+        self._pl_maximo[posiciones] = resumen.por_playlist.maximo
+
+        n_ay = len(self.categorias["Ayudante"])
+        self._ay_conteo = np.zeros(n_ay, dtype=np.int64)
+        self._ay_suma = np.zeros(n_ay, dtype=np.int64)
+        self._ay_minimo = np.full(n_ay, np.nan)
+        self._ay_maximo = np.full(n_ay, np.nan)
+        posiciones = [self._codigo_de["Ayudante"][c] for c in resumen.duracion_por_ayudante.claves]
+        self._ay_conteo[posiciones] = resumen.duracion_por_ayudante.conteo
+        self._ay_suma[posiciones] = resumen.duracion_por_ayudante.suma
+        self._ay_minimo[posiciones] = resumen.duracion_por_ayudante.minimo
+        self._ay_maximo[posiciones] = resumen.duracion_por_ayudante.maximo
+
+    def _ajustar_grupos(self):
+        """Agranda los acumuladores por grupo si aparecieron playlists o ayudantes nuevos."""
+        extra = len(self.categorias["playlist(s)"]) - len(self._pl_conteo)
+        if extra > 0:
+            m = len(METRICAS_RESUMEN)
+            self._pl_conteo = np.concatenate((self._pl_conteo, np.zeros(extra, dtype=np.int64)))
+            self._pl_suma = np.vstack((self._pl_suma, np.zeros((extra, m), dtype=np.int64)))
+            self._pl_minimo = np.vstack((self._pl_minimo, np.full((extra, m), np.nan)))
+            self._pl_maximo = np.vstack((self._pl_maximo, np.full((extra, m), np.nan)))
+        extra = len(self.categorias["Ayudante"]) - len(self._ay_conteo)
+        if extra > 0:
+            self._ay_conteo = np.concatenate((self._ay_conteo, np.zeros(extra, dtype=np.int64)))
+            self._ay_suma = np.concatenate((self._ay_suma, np.zeros(extra, dtype=np.int64)))
+            self._ay_minimo = np.concatenate((self._ay_minimo, np.full(extra, np.nan)))
+            self._ay_maximo = np.concatenate((self._ay_maximo, np.full(extra, np.nan)))
+
+    def _aportar(self, filas, signo):
+        """Suma (signo=+1) o resta (signo=-1) el aporte de 'filas' a los KPIs."""
+        if len(filas) == 0:
+            return
+        matriz = np.column_stack([self._buffers[m][filas] for m in METRICAS_RESUMEN])
+        validas = ~np.column_stack([self._malas[m][filas] for m in METRICAS_RESUMEN])
+        ceros = np.where(validas, matriz, 0)
+        self._conteo += signo * validas.sum(axis=0)
+        self._suma += signo * ceros.sum(axis=0)
+
+        codigos_pl = self._buffers["playlist(s)"][filas]
+        usar_pl = validas.all(axis=1) & (codigos_pl >= 0)
+        np.add.at(self._pl_conteo, codigos_pl[usar_pl], signo)
+        np.add.at(self._pl_suma, codigos_pl[usar_pl], signo * matriz[usar_pl])
+
+        codigos_ay = self._buffers["Ayudante"][filas]
+        duracion = self._buffers[COLUMNA_DURACION][filas]
+        usar_ay = ~self._malas[COLUMNA_DURACION][filas] & (codigos_ay >= 0)
+        np.add.at(self._ay_conteo, codigos_ay[usar_ay], signo)
+        np.add.at(self._ay_suma, codigos_ay[usar_ay], signo * duracion[usar_ay])
+
+        if signo > 0:
+            tope = np.iinfo(matriz.dtype)
+            self._minimo = np.minimum(self._minimo, np.where(validas, matriz, tope.max).min(axis=0))
+            self._maximo = np.maximum(self._maximo, np.where(validas, matriz, tope.min).max(axis=0))
+            _extremos_por_grupo(self._pl_minimo, self._pl_maximo, codigos_pl[usar_pl], matriz[usar_pl])
+            _extremos_por_grupo(self._ay_minimo, self._ay_maximo, codigos_ay[usar_ay], duracion[usar_ay])
+        else:
+            # Quitar un valor que era el mínimo o el máximo obliga a recalcularlos
+            if ((validas & ((matriz <= self._minimo) | (matriz >= self._maximo))).any()
+                    or (matriz[usar_pl] <= self._pl_minimo[codigos_pl[usar_pl]]).any()
+                    or (matriz[usar_pl] >= self._pl_maximo[codigos_pl[usar_pl]]).any()
+                    or (duracion[usar_ay] <= self._ay_minimo[codigos_ay[usar_ay]]).any()
+                    or (duracion[usar_ay] >= self._ay_maximo[codigos_ay[usar_ay]]).any()):
+                self._extremos_sucios = True
+
+    def _armar_resumen(self):
+        if self._extremos_sucios:
+            self._reiniciar_kpis(calcular_resumen(self._tabla))
+            return self._resumen
+        pl = self._pl_conteo > 0
+        ay = self._ay_conteo > 0
+        return Resumen(
+            n_videos=self.n,
+            metricas=METRICAS_RESUMEN,
+            conteo=self._conteo.copy(),
+            suma=self._suma.copy(),
+            media=self._suma / np.maximum(self._conteo, 1),
+            minimo=self._minimo.copy(),
+            maximo=self._maximo.copy(),
+            por_playlist=Grupos(
+                claves=[c for c, p in zip(self.categorias["playlist(s)"], pl) if p],
+                conteo=self._pl_conteo[pl],
+                suma=self._pl_suma[pl].astype(np.float64),
+                minimo=self._pl_minimo[pl],
+                maximo=self._pl_maximo[pl],
+            ),
+            duracion_por_ayudante=Grupos(
+                claves=[c for c, p in zip(self.categorias["Ayudante"], ay) if p],
+                conteo=self._ay_conteo[ay],
+                suma=self._ay_suma[ay].astype(np.float64),
+                minimo=self._ay_minimo[ay],
+                maximo=self._ay_maximo[ay],
+            ),
+            tabla=self._tabla,
+        )
+
+    # ------------------------------------------------------------------
+    # Lectura de la cola del archivo
+    # ------------------------------------------------------------------
+    def actualizar(self):
+        """
+        Incorpora lo que se haya agregado al CSV desde la última llamada y devuelve
+        (tabla, resumen, indice_fechas). Si el archivo no cambió, solo cuesta un os.stat.
+        """
+        return self.actualizar_con_version()[1:]
+
+    def actualizar_con_version(self):
+        """Como actualizar(), pero devuelve (version, tabla, resumen, indice_fechas)
+        leídos juntos, para usar la versión como clave de caché de lo que se derive."""
+        with self._lock:
+            tamano = os.stat(self.path).st_size
+            if tamano != self._tamano_visto:
+                if tamano < self._offset or self._leer_testigo() != self._testigo:
+                    self._recargar()
+                else:
+                    self._leer_cola(tamano)
+            return self.version, self._tabla, self._resumen, self._indice
+
+    def filas_cambiadas(self, desde, hasta):
+        """
+        Filas agregadas o reemplazadas después de la versión 'desde' y hasta la
+        versión 'hasta' inclusive (ordenadas, sin repetir). Devuelve None si alguna
+        de las dos no es una versión de la carga actual (por ejemplo, si el archivo
+        se volvió a cargar desde cero): hay que rehacer lo derivado completo.
+        """
+        with self._lock:
+            versiones = [self._version_base] + [v for v, _ in self._cambios]
+            if desde not in versiones or hasta not in versiones or hasta < desde:
+                return None
+            filas = [f for v, f in self._cambios if desde < v <= hasta]
+        if not filas:
+            return np.zeros(0, dtype=np.intp)
+        return np.unique(np.concatenate(filas))
+
+    def _leer_cola(self, tamano):
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            cola = f.read(tamano - self._offset)
+
+        # Solo se avanza el offset hasta la última línea completa; una última línea
+        # sin salto se procesa si ya tiene todos sus campos (se volverá a leer la
+        # próxima vez y, como es un upsert, no se duplica)
+        corte = cola.rfind(b"\n") + 1
+        completas = cola[:corte]
+        resto = cola[corte:]
+        if resto.strip():
+            campos = next(csv.reader([resto.decode("utf-8", errors="replace")]), [])
+            if len(campos) == len(self.encabezados):
+                completas = completas + resto + b"\n"
+
+        if completas.strip():
+            nuevas = pd.read_csv(
+                io.BytesIO(completas), header=None, names=self.encabezados,
+                dtype=str, keep_default_na=False, encoding="utf-8",
+            )
+            self._upsert(nuevas.drop_duplicates("videoId", keep="last"))
+
+        self._offset += corte
+        self._tamano_visto = tamano
+        self._testigo = self._leer_testigo()
+
+    def _upsert(self, nuevas):
+        if len(nuevas) == 0:
+            return
+        ids = nuevas["videoId"].tolist()
+        posiciones = np.fromiter((self._fila_por_id.get(v, -1) for v in ids), dtype=np.intp, count=len(ids))
+        existentes = posiciones >= 0
+        n_agregadas = int((~existentes).sum())
+
+        # Filas agregadas van al final de la tabla
+        posiciones[~existentes] = np.arange(self.n, self.n + n_agregadas)
+        ids_nuevos = np.array(ids, dtype=object)[~existentes]
+        for v, fila in zip(ids_nuevos, posiciones[~existentes].tolist()):
+            self._fila_por_id[v] = fila
+        self._bytes_textos += _bytes_textos(ids_nuevos)
+
+        # Quitar el aporte de las filas que se van a reemplazar
+        reemplazadas = posiciones[existentes]
+        fechas_previas = None
+        if len(reemplazadas):
+            self._aportar(reemplazadas, -1)
+            fechas_previas = self._buffers["publicado"][reemplazadas].copy()
+
+        self._crecer(self.n + n_agregadas)
+        if len(reemplazadas):
+            # Copy-on-write: las versiones ya publicadas no deben ver el reemplazo
+            for nombre in self.encabezados:
+                if self._buffers[nombre] is self._publicados.get(nombre):
+                    self._buffers[nombre] = self._buffers[nombre].copy()
+        for nombre in self.encabezados:
+            serie = nuevas[nombre]
+            if nombre in COLUMNAS_CATEGORICAS:
+                valores = self._codificar(nombre, serie.tolist())
+            elif nombre in COLUMNAS_ENTERAS or nombre in COLUMNAS_FECHA or nombre == COLUMNA_DURACION:
+                valores, filas_malas = convertir_columna(nombre, serie.reset_index(drop=True))
+                malas = np.zeros(len(valores), dtype=bool)
+                malas[filas_malas] = True
+                self._malas[nombre][posiciones] = malas
+            else:
+                valores = serie.to_numpy(dtype=object)
+                self._bytes_textos += _bytes_textos(valores) - _bytes_textos(self._buffers[nombre][reemplazadas])
+            self._buffers[nombre][posiciones] = valores
+        self.n += n_agregadas
+
+        self._ajustar_grupos()
+        self._aportar(posiciones, +1)
+        self._publicar(posiciones[~existentes], reemplazadas, fechas_previas)
+
+    def _codificar(self, nombre, valores):
+        codigo_de = self._codigo_de[nombre]
+        categorias = self.categorias[nombre]
+        codigos = np.empty(len(valores), dtype=np.int32)
+        for i, valor in enumerate(valores):
+            if valor == "":
+                codigos[i] = -1
+                continue
+            if valor not in codigo_de:
+                codigo_de[valor] = len(categorias)
+                categorias.append(valor)
+            codigos[i] = codigo_de[valor]
+        return codigos
+
+    def _crecer(self, n_total):
+        """Asegura que todos los buffers tengan espacio (y sean escribibles) para n_total filas."""
+        for nombre in list(self._buffers):
+            buffer = self._buffers[nombre]
+            if isinstance(buffer, ColumnaTexto):
+                # Pasa a ser un arreglo de str en memoria
+                self._bytes_textos += self.n * _BYTES_STR + int(buffer.offsets[self.n] - buffer.offsets[0])
+            self._buffers[nombre] = _con_capacidad(buffer, self.n, n_total)
+        for nombre in list(self._malas):
+            self._malas[nombre] = _con_capacidad(self._malas[nombre], self.n, n_total)
+
+    def _publicar(self, agregadas, reemplazadas, fechas_previas):
+        """Arma la nueva TablaYT, el índice temporal y el resumen a partir de los buffers."""
+        cambiadas = np.concatenate((reemplazadas, agregadas))
+        columnas = {}
+        for nombre in self.encabezados:
+            columnas[nombre] = self._buffers[nombre][:self.n]
+        errores = {}
+        for nombre, malas in self._malas.items():
+            errores[nombre] = np.flatnonzero(malas[:self.n])
+        categorias = {}
+        for nombre, valores in self.categorias.items():
+            categorias[nombre] = list(valores)
+        self._tabla = TablaYT(self.encabezados, columnas, categorias, errores)
+        self._publicados = dict(self._buffers)
+
+        # Índice temporal: si ninguna fecha de publicación cambió, solo se intercalan las filas nuevas
+        fechas = columnas["publicado"]
+        if fechas_previas is not None and not np.array_equal(fechas_previas, fechas[reemplazadas], equal_nan=True):
+            self._indice = indice_temporal(self._tabla)
+        else:
+            agregadas = agregadas[~np.isnat(fechas[agregadas])]
+            agregadas = agregadas[np.argsort(fechas[agregadas], kind="stable")]
+            donde = np.searchsorted(self._indice.fechas, fechas[agregadas], side="right")
+            self._indice = IndiceTemporal(
+                orden=np.insert(self._indice.orden, donde, agregadas),
+                fechas=np.insert(self._indice.fechas, donde, fechas[agregadas]),
+            )
+
+        self._resumen = self._armar_resumen()
+        self.version = next(_VERSIONES)
+        self._cambios.append((self.version, cambiadas))
+
+
+def _con_capacidad(arreglo, n_usado, n_total):
+    """Devuelve un arreglo escribible con lugar para n_total filas (duplica la capacidad al crecer)."""
+    if isinstance(arreglo, ColumnaTexto):
+        # tolist() decodifica todos los textos de una vez (indexar decodifica de a uno)
+        textos = arreglo.tolist()[:n_usado]
+        nuevo = np.empty(max(n_total, 2 * len(textos), 16), dtype=object)
+        nuevo[:n_usado] = textos
+        return nuevo
+    escribible = isinstance(arreglo, np.ndarray) and arreglo.flags.writeable and not isinstance(arreglo, np.memmap)
+    if escribible and len(arreglo) >= n_total:
+        return arreglo
+    capacidad = max(n_total, 2 * len(arreglo), 16)
+    nuevo = np.zeros(capacidad, dtype=arreglo.dtype)
+    nuevo[:n_usado] = arreglo[:n_usado]
+    return nuevo
+
+
+def _bytes_textos(textos):
+    """Estimación de la memoria de una secuencia de str, sin medir cada uno con sys.getsizeof."""
+    return len(textos) * _BYTES_STR + sum(map(len, textos))
+
+
+def _bytes_buffer(arreglo):
+    """Bytes propios de un buffer (su capacidad); los memory-maps no cuentan, como en la caché."""
+    if isinstance(arreglo, ColumnaTexto):
+        return _bytes_buffer(arreglo.datos) + _bytes_buffer(arreglo.offsets)
+    if isinstance(arreglo, np.memmap):
+        return 0
+    return arreglo.nbytes
+
+
+def _extremos_por_grupo(minimos, maximos, codigos, valores):
+    """Actualiza en el lugar los mínimos y máximos por grupo con valores nuevos (NaN = sin datos)."""
+    if len(codigos) == 0:
+        return
+    np.fmin.at(minimos, codigos, valores.astype(np.float64))
+    np.fmax.at(maximos, codigos, valores.astype(np.float64))
+
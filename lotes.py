@@ -0,0 +1,271 @@
+# lotes.py
+
+"""
+Lectura por lotes del CSV de YT-STATS con memoria acotada.
+
+- leer_lotes(path, filas_por_lote): generador que recorre el CSV por trozos y
+  entrega cada trozo ya convertido como una TablaYT pequeña (mismos tipos que
+  cargar_tabla). Los códigos de las columnas categóricas son consistentes entre
+  lotes: todos comparten la misma lista de categorías, que crece a medida que
+  aparecen valores nuevos.
+- filas_por_lote_para(path, memoria_maxima): elige el tamaño de lote para que un
+  trozo no supere un presupuesto de memoria en bytes.
+- AcumuladorLotes / resumir_csv: consumen los lotes uno a uno y producen los
+  mismos agregados que usa el dashboard (KPIs, subtotales por playlist y por
+  ayudante, estadísticas con percentiles, histograma de vistas, top K por
+  métrica y totales por día) sin tener nunca todo el archivo en memoria.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from agrupar import Grupos, agrupar
+from datos_yt import (
+    COLUMNA_DURACION,
+    COLUMNAS_CATEGORICAS,
+    COLUMNAS_ENTERAS,
+    COLUMNAS_FECHA,
+    TablaYT,
+    convertir_columna,
+)
+from estadisticas import EstadisticasEnLinea
+from graficos import HistogramaEnLinea
+from metricas import COLUMNAS_DESCRITAS, METRICAS_RANKING, METRICAS_RESUMEN, Resumen, top_k, valores_metrica
+
+# Un DataFrame de strings ocupa aproximadamente este múltiplo del texto del CSV
+FACTOR_MEMORIA = 10
+
+# Cantidad de videos que se guardan por métrica para el ranking en modo por lotes
+K_MAXIMO_LOTES = 100
+
+
+def bytes_por_fila(path, muestra=1000):
+    """Largo promedio en bytes de las primeras 'muestra' filas de datos del CSV."""
+    with open(path, "rb") as f:
+        f.readline()  # encabezados
+        leidos = 0
+        filas = 0
+        for linea in f:
+            leidos += len(linea)
+            filas += 1
+            if filas == muestra:
+                break
+    return leidos / filas if filas else 1
+
+
+def filas_por_lote_para(path, memoria_maxima):
+    """Filas por lote para que un lote en memoria no supere 'memoria_maxima' bytes (mínimo 1000)."""
+    return max(1000, int(memoria_maxima // (bytes_por_fila(path) * FACTOR_MEMORIA)))
+
+
+def leer_lotes(path, filas_por_lote=100_000):
+    """Genera una TablaYT por cada trozo de 'filas_por_lote' filas del CSV."""
+    categorias = {}
+    codigo_de = {}
+    for nombre in COLUMNAS_CATEGORICAS:
+        categorias[nombre] = []
+        codigo_de[nombre] = {}
+
+    trozos = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8", chunksize=filas_por_lote)
+    for trozo in trozos:
+        encabezados = list(trozo.columns)
+        trozo = trozo.reset_index(drop=True)
+        columnas = {}
+        errores = {}
+        for nombre in encabezados:
+            serie = trozo[nombre]
+            if nombre in COLUMNAS_CATEGORICAS:
+                columnas[nombre] = _codificar(serie.to_numpy(dtype=object), categorias[nombre], codigo_de[nombre])
+            elif nombre in COLUMNAS_ENTERAS or nombre in COLUMNAS_FECHA or nombre == COLUMNA_DURACION:
+                columnas[nombre], errores[nombre] = convertir_columna(nombre, serie)
+            else:
+                columnas[nombre] = serie.to_numpy(dtype=object)
+        yield TablaYT(encabezados, columnas, categorias, errores)
+
+
+def _codificar(valores, categorias, codigo_de):
+    """Códigos globales para un lote: solo se buscan en el diccionario los valores distintos."""
+    distintos, inversos = np.unique(valores, return_inverse=True)
+    codigos_distintos = np.empty(len(distintos), dtype=np.int32)
+    for i, valor in enumerate(distintos.tolist()):
+        if valor == "":
+            codigos_distintos[i] = -1
+            continue
+        if valor not in codigo_de:
+            codigo_de[valor] = len(categorias)
+            categorias.append(valor)
+        codigos_distintos[i] = codigo_de[valor]
+    return codigos_distintos[inversos]
+
+
+@dataclass
+class ResultadoLotes:
+    """
+    Todo lo que el dashboard necesita cuando el archivo se procesa por lotes.
+    - resumen      : metricas.Resumen (con las estadísticas ya calculadas)
+    - muestra      : primeras filas del archivo (como TablaYT.vista)
+    - top          : métrica -> (valores, títulos) de los K_MAXIMO_LOTES mejores
+    - histograma   : graficos.HistogramaEnLinea de las vistas
+    - dias         : fechas (datetime64[D]) con al menos un video publicado
+    - conteo_dias  : videos publicados cada día
+    - suma_dias    : (días x métricas) suma de cada métrica de METRICAS_RESUMEN por día
+    - duraciones_malas: cantidad de celdas de duración mal formadas
+    """
+    resumen: Resumen
+    muestra: dict
+    top: dict
+    histograma: HistogramaEnLinea
+    dias: np.ndarray
+    conteo_dias: np.ndarray
+    suma_dias: np.ndarray
+    duraciones_malas: int
+
+
+class AcumuladorLotes:
+    """Consume lotes (TablaYT) con agregar() y entrega un ResultadoLotes con resultado()."""
+
+    def __init__(self, k_maximo=K_MAXIMO_LOTES, filas_muestra=10):
+        m = len(METRICAS_RESUMEN)
+        self.k_maximo = k_maximo
+        self.filas_muestra = filas_muestra
+        self.n = 0
+        self.conteo = np.zeros(m, dtype=np.int64)
+        self.suma = np.zeros(m, dtype=np.int64)
+        self.minimo = np.full(m, np.iinfo(np.int64).max)
+        self.maximo = np.full(m, np.iinfo(np.int64).min)
+        self.categorias = {}
+        self.grupos = {}  # columna categórica -> [conteo, suma, mínimo, máximo] por código global
+        self.estadisticas = {}
+        for columna in COLUMNAS_DESCRITAS:
+            self.estadisticas[columna] = EstadisticasEnLinea()
+        self.histograma = HistogramaEnLinea()
+        self.top = {}
+        self.por_dia = {}  # día -> [conteo, suma por métrica...]
+        self.muestra = None
+        self.duraciones_malas = 0
+
+    def agregar(self, lote):
+        if self.muestra is None:
+            self.muestra = lote.vista(0, self.filas_muestra)
+        self.n += len(lote)
+        self.categorias = lote.categorias
+
+        # KPIs globales
+        matriz = np.column_stack([lote[m] for m in METRICAS_RESUMEN])
+        validas = np.column_stack([lote.validos(m) for m in METRICAS_RESUMEN])
+        self.conteo += validas.sum(axis=0)
+        self.suma += np.where(validas, matriz, 0).sum(axis=0)
+        tope = np.iinfo(np.int64)
+        self.minimo = np.minimum(self.minimo, np.where(validas, matriz, tope.max).min(axis=0, initial=tope.max))
+        self.maximo = np.maximum(self.maximo, np.where(validas, matriz, tope.min).max(axis=0, initial=tope.min))
+
+        # Subtotales por grupo, con los mismos filtros que calcular_resumen
+        self._agrupar("playlist(s)", lote["playlist(s)"], matriz, validas.all(axis=1))
+        self._agrupar("Ayudante", lote["Ayudante"], lote[COLUMNA_DURACION], lote.validos(COLUMNA_DURACION))
+        self.duraciones_malas += len(lote.errores[COLUMNA_DURACION])
+
+        for columna, acumulador in self.estadisticas.items():
+            acumulador.agregar(lote[columna][lote.validos(columna)])
+        self.histograma.agregar(lote["vistas"][lote.validos("vistas")])
+
+        # Top K: los candidatos de este lote compiten con los que ya teníamos
+        for metrica in METRICAS_RANKING.values():
+            valores = valores_metrica(lote, metrica)
+            elegidos = top_k(valores, self.k_maximo)
+            nuevos_valores = valores[elegidos]
+            nuevos_titulos = np.asarray(lote["título"][elegidos], dtype=object)
+            if metrica in self.top:
+                previos_valores, previos_titulos = self.top[metrica]
+                nuevos_valores = np.concatenate((previos_valores, nuevos_valores))
+                nuevos_titulos = np.concatenate((previos_titulos, nuevos_titulos))
+            mejores = top_k(nuevos_valores, self.k_maximo)
+            self.top[metrica] = (nuevos_valores[mejores], nuevos_titulos[mejores])
+
+        # Totales por día de publicación
+        con_fecha = lote.validos("publicado") & validas.all(axis=1)
+        if con_fecha.any():
+            por_dia = agrupar(lote["publicado"][con_fecha].astype("datetime64[D]"), matriz[con_fecha])
+            for dia, conteo, suma in zip(por_dia.claves, por_dia.conteo.tolist(), por_dia.suma.tolist()):
+                acumulado = self.por_dia.setdefault(dia, [0] + [0] * len(METRICAS_RESUMEN))
+                acumulado[0] += conteo
+                for j, valor in enumerate(suma):
+                    acumulado[j + 1] += int(valor)
+
+    def _agrupar(self, columna, codigos, valores, mascara):
+        categorias = self.categorias[columna]
+        grupos = agrupar(codigos, valores, categorias, mascara)
+        # agrupar omite los grupos vacíos y deja el resto en orden de código
+        presentes = np.unique(codigos[(codigos >= 0) & mascara])
+
+        forma = (len(categorias),) + np.shape(valores)[1:]
+        acumulado = self.grupos.get(columna)
+        if acumulado is None or len(acumulado[0]) < len(categorias):
+            # Aparecieron categorías nuevas: agrandamos los acumuladores
+            nuevo = [np.zeros(len(categorias), dtype=np.int64), np.zeros(forma),
+                     np.full(forma, np.nan), np.full(forma, np.nan)]
+            if acumulado is not None:
+                for destino, origen in zip(nuevo, acumulado):
+                    destino[:len(origen)] = origen
+            acumulado = nuevo
+            self.grupos[columna] = acumulado
+        acumulado[0][presentes] += grupos.conteo
+        acumulado[1][presentes] += grupos.suma
+        acumulado[2][presentes] = np.fmin(acumulado[2][presentes], grupos.minimo)
+        acumulado[3][presentes] = np.fmax(acumulado[3][presentes], grupos.maximo)
+
+    def consumir(self, lotes):
+        for lote in lotes:
+            self.agregar(lote)
+        return self
+
+    def resultado(self):
+        grupos = {}
+        for columna, (conteo, suma, minimo, maximo) in self.grupos.items():
+            presentes = conteo > 0
+            grupos[columna] = Grupos(
+                claves=[c for c, p in zip(self.categorias[columna], presentes) if p],
+                conteo=conteo[presentes],
+                suma=suma[presentes],
+                minimo=minimo[presentes],
+                maximo=maximo[presentes],
+            )
+        estadisticas = {}
+        for columna, acumulador in self.estadisticas.items():
+            estadisticas[columna] = acumulador.resultado()
+        resumen = Resumen(
+            n_videos=self.n,
+            metricas=METRICAS_RESUMEN,
+            conteo=self.conteo,
+            suma=self.suma,
+            media=self.suma / np.maximum(self.conteo, 1),
+            minimo=self.minimo,
+            maximo=self.maximo,
+            por_playlist=grupos.get("playlist(s)"),
+            duracion_por_ayudante=grupos.get("Ayudante"),
+            _estadisticas=estadisticas,
+        )
+
+        dias = np.array(sorted(self.por_dia), dtype="datetime64[D]")
+        totales = np.array([self.por_dia[d] for d in dias.tolist()], dtype=np.int64).reshape(len(dias), -1)
+        return ResultadoLotes(
+            resumen=resumen,
+            muestra=self.muestra or {},
+            top=self.top,
+            histograma=self.histograma,
+            dias=dias,
+            conteo_dias=totales[:, 0] if len(dias) else np.zeros(0, dtype=np.int64),
+            suma_dias=totales[:, 1:] if len(dias) else np.zeros((0, len(METRICAS_RESUMEN)), dtype=np.int64),
+            duraciones_malas=self.duraciones_malas,
+        )
+
+
+def resumir_csv(path, memoria_maxima=None, filas_por_lote=100_000):
+    """
+    Recorre el CSV una vez, por lotes, y devuelve un ResultadoLotes. Si se indica
+    'memoria_maxima' (bytes), el tamaño de lote se ajusta a ese presupuesto.
+    """
+    if memoria_maxima is not None:
+        filas_por_lote = filas_por_lote_para(path, memoria_maxima)
+    return AcumuladorLotes().consumir(leer_lotes(path, filas_por_lote)).resultado()
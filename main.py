@@ -3,16 +3,31 @@
 """
 Demo de Streamlit para Usach Premium Stats.
 Muestra ejemplos de:
-- Lectura de un CSV con csv.reader
-- Visualización de datos crudos
+- Lectura de un CSV a columnas tipadas, con snapshot binario en disco e ingesta incremental
+  (ver datos_yt.py, snapshot.py e ingesta.py), guardada en una caché con límites (cache_datos.py)
+- Visualización de datos crudos por páginas (columnas y orden a elección)
+- Búsqueda por título (índice invertido, sin distinguir tildes) y filtros por playlist,
+  ayudante, privacidad y categoría (índices de bitmaps) que se aplican a todas las páginas
 - KPIs con st.metric y listado de top videos
-- Gráficos de series de tiempo con Vega-Lite
+- Gráficos de series de tiempo con Vega-Lite (filtro por fechas y remuestreo)
 - Histogramas, donut chart y barras para ayudantía
-- Cálculo manual de estadísticas básicas
+- Estadísticas descriptivas y percentiles de una sola pasada
 """
 
+import os
+
 import streamlit as st
-import csv
+import numpy as np
+
+from bitmaps import contar, desempaquetar, extender_indices_bitmap, filtrar, indices_bitmap
+from busqueda import extender_indice_titulos, indice_titulos, palabras
+from cache_datos import MEMORIA_MAXIMA_MB, cache_global
+from graficos import PERIODOS, histograma, reducir_puntos, remuestrear, remuestrear_totales
+from ingesta import IngestaIncremental
+from indices import indice_temporal, orden_por
+from lotes import FACTOR_MEMORIA, K_MAXIMO_LOTES, resumir_csv
+from metricas import METRICAS_RANKING, calcular_resumen, top_k, valores_metrica
+from snapshot import firma_archivo
 
 # --- Configuración de la página ---
 st.set_page_config(
@@ -21,6 +36,9 @@ st.set_page_config(
     layout="wide"  # Configura el diseño de la página como ancho completo
 )
 
+# Máximo de puntos que se envían al gráfico de series de tiempo
+MAX_PUNTOS_SERIE = 1000
+
 # --- Definición de la paleta de colores ---
 COLORS = {
     "primary": "#00A499",  # Color principal para elementos destacados
@@ -61,6 +79,13 @@ page = st.sidebar.radio("Ir a", [
     "Datos crudos", "Visión general", "Series de tiempo", "Distribuciones", "Estadísticas"
 ])
 
+# --- Sidebar: Búsqueda por título ---
+# Si hay una búsqueda, todas las páginas trabajan solo con los videos encontrados.
+# El cuadro se dibuja más abajo, cuando ya se sabe si los datos se procesan por lotes
+caja_busqueda = st.sidebar.empty()
+# Los filtros se llenan más abajo, cuando ya se conocen los valores de cada columna
+barra_filtros = st.sidebar.expander("Filtros")
+
 
 st.sidebar.markdown("---")
 
@@ -82,54 +107,201 @@ st.sidebar.markdown(
 )
 
 # --- Función para cargar datos del CSV ---
-@st.cache_data  # Cachea los datos para mejorar el rendimiento
-def cargar_datos(path): # 
+# La caché del proceso (ver cache_datos.py) comparte un mismo objeto entre todas las
+# sesiones sin copiarlo, y a diferencia de st.cache_resource tiene límite de entradas,
+# tiempo de vida y presupuesto de bytes (configurables con variables de entorno).
+# La ingesta se guarda con proteger=False porque sigue agregando filas a sus arreglos.
+CACHE = cache_global()
+
+@CACHE.memoizar(proteger=False)
+def cargar_datos(path):
+    """
+    Devuelve la IngestaIncremental del CSV (ver ingesta.py). La primera carga usa
+    el snapshot binario (ver snapshot.py); después, en cada ejecución solo se leen
+    las filas que se hayan agregado al archivo.
     """
-    Carga el CSV y devuelve encabezados y lista de filas.
-    Cada fila es una lista de strings.
+    return IngestaIncremental(path)
+
+@CACHE.memoizar
+def resumir_por_lotes(path, firma):
+    """
+    Para archivos que no caben en memoria: recorre el CSV una vez por lotes
+    acotados por MEMORIA_MAXIMA_MB y devuelve un ResultadoLotes (ver lotes.py).
+    'firma' (fecha de modificación y tamaño) hace que se recalcule si el archivo cambia.
     """
-    data = []
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        headers = next(reader)  # encabezados
-        for row in reader:
-            data.append(row)
-    return headers, data
+    return resumir_csv(path, memoria_maxima=MEMORIA_MAXIMA_MB * 1024 * 1024)
 
 # --- Leer datos ---
+# actualizar() devuelve:
+#   - una TablaYT (ver datos_yt.py): cada columna es un arreglo de NumPy con su
+#     tipo (enteros, fechas, segundos o códigos categóricos)
+#   - un Resumen (ver metricas.py) con los KPIs ya calculados
+#   - un IndiceTemporal (ver indices.py) con las filas ordenadas por fecha de publicación
 data_path = "./Usach Premium STATS - YT-STATS.csv"
-headers, data = cargar_datos(data_path)
+
+# Si el CSV ya convertido no cabe en el presupuesto de memoria, se recorre por lotes
+# (ver lotes.py) y solo se guardan los agregados, no la tabla completa
+modo_lotes = os.path.getsize(data_path) * FACTOR_MEMORIA > MEMORIA_MAXIMA_MB * 1024 * 1024
+if modo_lotes:
+    firma = firma_archivo(data_path)
+    lotes = resumir_por_lotes(data_path, firma)
+    tabla, resumen, indice_fechas = None, lotes.resumen, None
+    version_datos = ("lotes", data_path, firma)
+    headers = list(lotes.muestra.keys())
+    st.info(
+        "El archivo supera el presupuesto de memoria (" + str(MEMORIA_MAXIMA_MB) + " MB): "
+        "se procesó por lotes y se muestran solo agregados."
+    )
+else:
+    ingesta = cargar_datos(data_path)
+    version_previa = ingesta.version
+    version, tabla, resumen, indice_fechas = ingesta.actualizar_con_version()
+    if version != version_previa:
+        # La ingesta creció con los datos nuevos: se actualizan sus bytes en la caché
+        cargar_datos.remedir(data_path)
+    version_datos = ("ingesta", data_path, version)
+    headers = tabla.encabezados
+
+# --- Vistas derivadas ---
+# Lo que cada página calcula a partir de los datos (puntos de un gráfico, filas de
+# una tabla) se guarda en la misma caché con clave (versión de los datos, página,
+# parámetros de los widgets). Un rerun que no cambia esos parámetros, en esta u
+# otra sesión, reutiliza el resultado; cuando llegan datos nuevos cambia la versión
+# y las vistas viejas terminan saliendo de la caché por LRU/TTL.
+def vista_derivada(pagina, parametros, calcular):
+    return CACHE.obtener(("vista", version_datos, pagina, parametros), calcular)
+
+# --- Índices que se extienden con cada versión ---
+# Los índices de la búsqueda y de los filtros se guardan junto con la versión de
+# los datos para la que se armaron. Cuando la ingesta publica una versión nueva no
+# se arman de cero: se parte del último y solo se procesan las filas agregadas o
+# reemplazadas desde entonces (ver IngestaIncremental.filas_cambiadas).
+def indice_incremental(nombre, armar, extender):
+    clave = ("indice", data_path, nombre)
+    guardado = CACHE.consultar(clave)
+    if guardado is not None and guardado[0] == version:
+        return guardado[1]
+    filas = None if guardado is None else ingesta.filas_cambiadas(guardado[0], version)
+    indice = armar(tabla) if filas is None else extender(guardado[1], tabla, filas)
+    if guardado is None or version > guardado[0]:
+        CACHE.guardar(clave, (version, indice))
+    return indice
+
+def subconjunto(filas):
+    """(tabla, resumen, indice_fechas) con solo las 'filas' indicadas, en orden de archivo."""
+    sub = tabla.seleccionar(np.sort(filas))
+    return sub, calcular_resumen(sub), indice_temporal(sub)
+
+# --- Filtros globales: barra de filtros y búsqueda por título ---
+# Los filtros por columna usan índices de bitmaps (ver bitmaps.py): combinarlos con
+# Y/O recorre n/64 palabras. La búsqueda usa un índice invertido de títulos (ver
+# busqueda.py). Ambos índices se extienden con cada versión de los datos (ver indice_incremental).
+consulta = caja_busqueda.text_input(
+    "Buscar por título", placeholder="Ej: física ayudantía", disabled=modo_lotes
+)
+if modo_lotes:
+    barra_filtros.caption("Los filtros y la búsqueda no están disponibles en modo por lotes.")
+else:
+    indices_filtro = indice_incremental("filtros/indices", indices_bitmap, extender_indices_bitmap)
+    seleccion = {}
+    for columna, indice in indices_filtro.items():
+        seleccion[columna] = barra_filtros.multiselect(columna, indice.valores)
+    modo_filtro = barra_filtros.radio(
+        "Combinar columnas con", ["Y", "O"], horizontal=True,
+        help="Y: cumplir todas las columnas filtradas. O: cumplir alguna. Dentro de una columna siempre es O."
+    )
+    bits_filtro = filtrar(indices_filtro, seleccion, modo_filtro)
+
+    claves_filtro = []
+    filas_filtradas = None
+    if bits_filtro is not None:
+        activos = []
+        for columna, elegidos in seleccion.items():
+            if elegidos:
+                activos.append((columna, tuple(elegidos)))
+        claves_filtro.append(("filtros", modo_filtro, tuple(activos)))
+        barra_filtros.caption(str(contar(bits_filtro)) + " video(s) cumplen los filtros.")
+        filas_filtradas = np.flatnonzero(desempaquetar(bits_filtro, len(tabla)))
+
+    if consulta.strip():
+        terminos = " ".join(palabras(consulta))
+        indice_busqueda = indice_incremental("busqueda/indice", indice_titulos, extender_indice_titulos)
+        encontrados = indice_busqueda.buscar(terminos)
+        if bits_filtro is not None:
+            # Solo los encontrados que además cumplen los filtros (se mantiene el orden por vistas)
+            encontrados = encontrados[desempaquetar(bits_filtro, len(tabla))[encontrados]]
+        st.sidebar.caption(str(len(encontrados)) + " video(s) coinciden, ordenados por vistas:")
+        for fila in encontrados[:5].tolist():
+            st.sidebar.caption("- " + tabla["título"][fila] + " (" + str(tabla["vistas"][fila]) + " vistas)")
+        claves_filtro.append(("título", terminos))
+        filas_filtradas = encontrados
+
+    if claves_filtro:
+        if len(filas_filtradas) == 0:
+            st.warning("Ningún video cumple la búsqueda y los filtros elegidos.")
+            st.stop()
+        # Desde aquí las páginas ven solo las filas filtradas; la versión de los datos
+        # incluye los filtros para que sus vistas derivadas no se mezclen
+        claves_filtro = tuple(claves_filtro)
+        tabla, resumen, indice_fechas = vista_derivada(
+            "filtros/subconjunto", claves_filtro, lambda: subconjunto(filas_filtradas)
+        )
+        version_datos = version_datos + claves_filtro
+
+# Contadores de la caché, para dimensionarla (aciertos, desalojos, bytes usados)
+with st.sidebar.expander("Caché de datos"):
+    st.json(CACHE.estadisticas())
 
 # --- Página: Datos crudos ---
 if page == "Datos crudos":
     st.header("Datos crudos")
-    st.markdown("Se muestran los encabezados y los primeros registros tal cual se cargan.")
-    st.write("Encabezados:", headers)
-    st.write("Primeros registros:")
-    st.dataframe(data[:10], use_container_width=True)
+    st.markdown("Registros ya convertidos a su tipo, por páginas, con columnas y orden a elección.")
+
+    if modo_lotes:
+        # En modo por lotes no hay tabla en memoria: solo la muestra del comienzo del archivo
+        st.write("Encabezados:", headers)
+        st.write("Primeros registros:")
+        st.dataframe(lotes.muestra, use_container_width=True)
+        st.stop()
+
+    # Proyección: solo se leen y se envían las columnas elegidas
+    columnas_vista = st.multiselect("Columnas", headers, default=headers)
+    col_orden, col_sentido, col_tamano = st.columns(3)
+    sin_orden = "(orden del archivo)"
+    orden_col = col_orden.selectbox("Ordenar por", [sin_orden] + headers)
+    descendente = col_sentido.checkbox("Descendente", value=False)
+    tamano_pagina = col_tamano.selectbox("Filas por página", [10, 25, 50, 100, 500], index=1)
+
+    n_filas = len(tabla)
+    n_paginas = max(1, -(-n_filas // tamano_pagina))
+    pagina_actual = st.number_input("Página (de " + str(n_paginas) + ")", min_value=1, max_value=n_paginas, value=1)
+    inicio = (int(pagina_actual) - 1) * tamano_pagina
+    fin = min(n_filas, inicio + tamano_pagina)
+
+    # El orden completo se calcula una vez por (versión, columna, sentido) y queda en
+    # caché; cada página después solo toma su tramo: O(tamaño de página)
+    if orden_col == sin_orden:
+        filas = slice(inicio, fin)
+    else:
+        orden = vista_derivada(page + "/orden", (orden_col, descendente), lambda: orden_por(tabla, orden_col, descendente))
+        filas = orden[inicio:fin]
+    st.dataframe(tabla.vista_filas(filas, columnas_vista), use_container_width=True)
+    st.caption("Filas " + str(inicio + 1) + " a " + str(fin) + " de " + str(n_filas) + ".")
 
 # --- Página: Visión general ---
 elif page == "Visión general":
     st.header("Visión general")
-    st.markdown("KPIs básicos y top 5 videos por vistas.")
-    
+    st.markdown("KPIs básicos y top K videos según la métrica elegida.")
+
+    # Los KPIs vienen precalculados en el resumen: aquí solo se leen
     # 1) Total de videos
-    total_videos = len(data)
+    total_videos = resumen.n_videos
     
     # 2) Total de vistas
-    total_vistas = 0
-    for row in data:
-        total_vistas += int(row[7])
+    total_vistas = resumen.kpi("vistas", "suma")
         
     # 3) Promedio de likes
-    suma_likes = 0
-    for row in data:
-        suma_likes += int(row[8])
-    # Calcular promedio de likes
-    if total_videos == 0:
-        promedio_likes = 0
-    else:
-        promedio_likes = round(suma_likes / total_videos, 2)
+    promedio_likes = round(resumen.kpi("likes", "media"), 2)
 
     # Mostrar las 3 métricas
     col1, col2, col3 = st.columns(3)
@@ -137,48 +309,115 @@ elif page == "Visión general":
     col2.metric("Total de vistas", total_vistas)
     col3.metric("Promedio de likes", promedio_likes)
 
-    # --- Top 5 videos por vistas ---
-    st.subheader("Top 5 videos por vistas")
-    def get_vistas(row):
-        try:
-            return int(row[7])
-        except:
-            return 0
-    top5 = sorted(data, key=get_vistas, reverse=True)[:5]
-    for i, row in enumerate(top5, 1):
-        st.write(str(i) + ". **" + row[1] + "**: " + str(get_vistas(row)) + " vistas")
+    # --- Top K videos por la métrica elegida ---
+    st.subheader("Top videos")
+    col_k, col_metrica = st.columns(2)
+    k = col_k.number_input(
+        "Cantidad de videos (K)",
+        min_value=1,
+        max_value=max(1, min(total_videos, K_MAXIMO_LOTES) if modo_lotes else total_videos),
+        value=min(5, max(1, total_videos))
+    )
+    etiqueta = col_metrica.selectbox("Ordenar por", list(METRICAS_RANKING.keys()))
+
+    def calcular_top():
+        if modo_lotes:
+            # En modo por lotes el ranking ya viene calculado (los K_MAXIMO_LOTES mejores)
+            ranking, titulos = lotes.top[METRICAS_RANKING[etiqueta]]
+            elegidos = np.arange(min(int(k), len(ranking)))
+        else:
+            ranking = valores_metrica(tabla, METRICAS_RANKING[etiqueta])
+            titulos = tabla["título"]
+            # Selección parcial: O(n) para elegir los K mejores y O(K log K) para ordenarlos
+            elegidos = top_k(ranking, int(k))
+        lineas = []
+        for i, fila in enumerate(elegidos, 1):
+            if METRICAS_RANKING[etiqueta] == "engagement":
+                valor = f"{ranking[fila]:.2%} de engagement"
+            else:
+                valor = str(ranking[fila]) + " " + METRICAS_RANKING[etiqueta]
+            lineas.append(str(i) + ". **" + titulos[fila] + "**: " + valor)
+        return lineas
+
+    for linea in vista_derivada(page, (etiqueta, int(k)), calcular_top):
+        st.write(linea)
 
 # --- Página: Series de tiempo ---
 elif page == "Series de tiempo":
     st.header("Series de tiempo")
-    st.markdown("Gráfico de línea de métricas por video (orden cronológico).")
+    st.markdown("Métricas por fecha de publicación, por video o agrupadas por día, semana o mes.")
+
+    # En modo por lotes solo hay totales por día, no los valores de cada video
+    fechas_disponibles = lotes.dias if modo_lotes else indice_fechas.fechas
+    if len(fechas_disponibles) == 0:
+        st.write("No hay videos con fecha de publicación válida.")
+        st.stop()
     
     # Definir opciones de métrica
-    metric_options = {"Vistas": 7, "Likes": 8, "Comentarios": 9}
+    metric_options = {"Vistas": "vistas", "Likes": "likes", "Comentarios": "comentarios"}
     metric_name = st.selectbox("Selecciona la métrica", list(metric_options.keys()))
-    idx = metric_options[metric_name] # Índice de la métrica seleccionada
-    
-    # Construir lista de valores
-    values = []
-    for row in data:
-        try:
-            values.append(int(row[idx]))
-        except:
-            values.append(0)
-    
-    # Slider para número de puntos a graficar
-    count = st.slider("Cantidad de videos a graficar", 1, len(values), len(values))
-    
-    # Preparar datos para Vega-Lite
-    plot_data = []
-    for i, v in enumerate(values[:count]):
-        plot_data.append({"index": i + 1, metric_name: v})
-    
+
+    # Rango de fechas: se resuelve con búsqueda binaria sobre el índice ordenado
+    primera = fechas_disponibles[0].astype("datetime64[D]").item()
+    ultima = fechas_disponibles[-1].astype("datetime64[D]").item()
+    rango = st.date_input("Rango de publicación", value=(primera, ultima), min_value=primera, max_value=ultima)
+    if len(rango) == 2:
+        desde, hasta = rango
+    else:
+        desde, hasta = rango[0], ultima
+    hasta_excluido = np.datetime64(hasta) + np.timedelta64(1, "D")
+
+    col_periodo, col_agregado = st.columns(2)
+    periodos = list(PERIODOS.keys()) if modo_lotes else ["Video"] + list(PERIODOS.keys())
+    periodo = col_periodo.selectbox("Agrupar por", periodos)
+    agregados = {"Suma": "suma", "Promedio": "media", "Cantidad de videos": "conteo"}
+    agregado = col_agregado.selectbox("Agregación", list(agregados.keys()), disabled=periodo == "Video")
+    mostrar_todo = False
+    if periodo == "Video":
+        # Reducir la cantidad de puntos: se envían a lo más MAX_PUNTOS_SERIE al navegador,
+        # conservando el mínimo y el máximo de cada tramo para que los picos sigan visibles
+        mostrar_todo = st.checkbox("Mostrar todos los puntos (sin reducir)", value=False)
+
+    def calcular_serie():
+        """Devuelve (datos del gráfico, videos en el rango, puntos antes de reducir)."""
+        if modo_lotes:
+            i, j = np.searchsorted(lotes.dias, [np.datetime64(desde, "D"), hasta_excluido])
+            columna = resumen.metricas.index(metric_options[metric_name])
+            plot_data = remuestrear_totales(
+                lotes.dias[i:j], lotes.conteo_dias[i:j], lotes.suma_dias[i:j, columna],
+                PERIODOS[periodo], agregados[agregado]
+            )
+            n_en_rango = int(lotes.conteo_dias[i:j].sum())
+            return plot_data, n_en_rango, len(plot_data)
+
+        i, j = indice_fechas.posiciones(desde, hasta_excluido)
+        filas = indice_fechas.orden[i:j]
+        fechas = indice_fechas.fechas[i:j]
+        values = tabla[metric_options[metric_name]][filas]  # Columna ya convertida, en orden cronológico
+        if periodo != "Video":
+            plot_data = remuestrear(fechas, values, PERIODOS[periodo], agregados[agregado])
+            return plot_data, len(filas), len(plot_data)
+        if mostrar_todo:
+            indices = np.arange(len(values))
+        else:
+            indices = reducir_puntos(values, MAX_PUNTOS_SERIE)
+        plot_data = {
+            "fecha": np.datetime_as_string(fechas[indices]).tolist(),
+            "valor": values[indices].tolist()
+        }
+        return plot_data, len(filas), len(values)
+
+    parametros = (metric_name, desde, hasta, periodo, agregados[agregado], mostrar_todo)
+    plot_data, n_en_rango, n_puntos = vista_derivada(page, parametros, calcular_serie)
+    if periodo == "Video" and len(plot_data["fecha"]) < n_puntos:
+        st.caption("Se muestran " + str(len(plot_data["fecha"])) + " de " + str(n_puntos) + " puntos (mínimo y máximo por tramo).")
+
+    st.caption(str(n_en_rango) + " videos publicados en el rango seleccionado.")
     spec = {
-        "mark": {"type": "line", "color": COLORS["primary"]},
+        "mark": {"type": "line", "color": COLORS["primary"], "point": periodo != "Video"},
         "encoding": {
-            "x": {"field": "index", "type": "quantitative", "title": "Video (orden)"},
-            "y": {"field": metric_name, "type": "quantitative", "title": metric_name}
+            "x": {"field": "fecha", "type": "temporal", "title": "Fecha de publicación"},
+            "y": {"field": "valor", "type": "quantitative", "title": metric_name}
         }
     }
     st.vega_lite_chart(plot_data, spec, use_container_width=True)
@@ -189,17 +428,24 @@ elif page == "Distribuciones":
     st.markdown("Histogramas y gráficos adicionales para explorar el dataset.")
 
     # -- Histograma de vistas --
-    hist_data = []
-    for row in data:
-        try:
-            hist_data.append({"vistas": int(row[7])})
-        except:
-            pass
+    # Los intervalos se calculan en el servidor: al navegador solo viajan bordes y frecuencias
+    col_bins, col_log = st.columns(2)
+    n_bins = col_bins.slider("Cantidad de intervalos", 5, 100, 20)
+    escala_log = col_log.checkbox("Intervalos en escala logarítmica", value=False)
+    def calcular_histograma():
+        if modo_lotes:
+            return lotes.histograma.histograma(n_bins, escala_log)
+        return histograma(tabla["vistas"][tabla.validos("vistas")], n_bins, escala_log)
+    hist_data = vista_derivada(page + "/histograma", (n_bins, escala_log), calcular_histograma)
     hist_spec = {
         "mark": {"type": "bar", "color": COLORS["secondary"]},
         "encoding": {
-            "x": {"field": "vistas", "type": "quantitative", "bin": {"maxbins": 20}, "title": "Vistas"},
-            "y": {"aggregate": "count", "type": "quantitative", "title": "Frecuencia"}
+            "x": {
+                "field": "desde", "type": "quantitative", "title": "Vistas",
+                "scale": {"type": "symlog" if escala_log else "linear"}
+            },
+            "x2": {"field": "hasta"},
+            "y": {"field": "frecuencia", "type": "quantitative", "title": "Frecuencia"}
         }
     }
     st.subheader("Histograma de vistas")
@@ -207,26 +453,13 @@ elif page == "Distribuciones":
 
     # -- Gráfico de anillo: vistas promedio por playlist --
     st.subheader("Vistas promedio por Playlist")
-    # Obtener playlists únicas
-    playlists = []
-    for row in data:
-        pl = row[4]
-        if pl not in playlists:
-            playlists.append(pl)
-    # Calcular promedio de vistas por playlist
-    playlist_avg = []
-    for pl in playlists:
-        total = 0
-        count_pl = 0
-        for row in data:
-            if row[4] == pl:
-                try:
-                    total += int(row[7])
-                    count_pl += 1
-                except:
-                    pass
-        avg = total / count_pl if count_pl else 0
-        playlist_avg.append({"playlist": pl, "avg_vistas": round(avg, 2)})
+    # Promedio de vistas por playlist (subtotales precalculados en el resumen)
+    def calcular_playlist_avg():
+        playlist_avg = []
+        for pl, avg in zip(resumen.por_playlist.claves, resumen.columna_playlist("vistas", "media")):
+            playlist_avg.append({"playlist": pl, "avg_vistas": round(float(avg), 2)})
+        return playlist_avg
+    playlist_avg = vista_derivada(page + "/playlists", (), calcular_playlist_avg)
     # Vega-Lite donut
     donut_spec = {
         "mark": {"type": "arc", "innerRadius": 50},
@@ -239,34 +472,21 @@ elif page == "Distribuciones":
 
     # -- Horas de ayudantía por ayudante --
     st.subheader("Horas de ayudantía por Ayudante")
-    # Función para convertir 'H:MM:SS' a horas decimales
-    def parse_horas(s):
-        parts = s.split(":")
-        try:
-            if len(parts) == 3:
-                h, m, sec = map(int, parts)
-            elif len(parts) == 2:
-                h = 0
-                m, sec = map(int, parts)
-            else:
-                return 0
-            return h + m / 60 + sec / 3600
-        except:
-            return 0
-
-    # Agrupar y sumar horas por ayudante
-    ayudantes = []
-    for row in data:
-        ay = row[14]
-        if ay and ay not in ayudantes:
-            ayudantes.append(ay)
-    horas_by_ayu = []
-    for ay in ayudantes:
-        total_h = 0
-        for row in data:
-            if row[14] == ay:
-                total_h += parse_horas(row[3])
-        horas_by_ayu.append({"ayudante": ay, "horas": round(total_h, 2)})
+    # Agrupar y sumar horas por ayudante (la duración ya viene en segundos)
+    # Las duraciones mal formadas se excluyen y se informan (no se cuentan como 0 en silencio)
+    por_ayudante = resumen.duracion_por_ayudante
+    n_malas = lotes.duraciones_malas if modo_lotes else len(tabla.errores["duración"])
+    if n_malas:
+        st.warning(str(n_malas) + " video(s) con duración mal formada quedaron fuera de este gráfico.")
+        if not modo_lotes:
+            with st.expander("Ver videos con duración mal formada"):
+                st.write(tabla["título"][tabla.errores["duración"]].tolist())
+    def calcular_horas_by_ayu():
+        horas_by_ayu = []
+        for ay, segundos in zip(por_ayudante.claves, por_ayudante.suma):
+            horas_by_ayu.append({"ayudante": ay, "horas": round(float(segundos) / 3600, 2)})
+        return horas_by_ayu
+    horas_by_ayu = vista_derivada(page + "/ayudantes", (), calcular_horas_by_ayu)
 
     # Barra vertical con Vega-Lite
     bar_spec = {
@@ -281,53 +501,31 @@ elif page == "Distribuciones":
 # --- Página: Estadísticas ---
 elif page == "Estadísticas":
     st.header("Estadísticas")
-    st.markdown("Cálculo manual de media, mediana, desviación estándar, mínimo y máximo.")
-
-    # Extraer lista de vistas
-    vistas = []
-    for row in data:
-        try:
-            vistas.append(int(row[7]))
-        except:
-            pass
-
-    # Función para media
-    def calcular_media(valores):
-        total = 0
-        for x in valores:
-            total += x
-        return total / len(valores) if valores else 0
-
-    # Función para mediana
-    def calcular_mediana(valores):
-        sorted_vals = sorted(valores)
-        n = len(sorted_vals)
-        if n == 0:
-            return 0
-        if n % 2 == 1:
-            return sorted_vals[n // 2]
-        else:
-            return (sorted_vals[n // 2 - 1] + sorted_vals[n // 2]) / 2
-
-    # Función para desviación estándar
-    def calcular_desviacion_estandar(valores):
-        media = calcular_media(valores)
-        suma_diff = 0
-        for x in valores:
-            suma_diff += (x - media) ** 2
-        varianza = suma_diff / len(valores) if valores else 0
-        return varianza ** 0.5
-
-    # Realizar cálculos
-    media_v = calcular_media(vistas)
-    mediana_v = calcular_mediana(vistas)
-    desv_v = calcular_desviacion_estandar(vistas)
-    min_v = min(vistas) if vistas else 0
-    max_v = max(vistas) if vistas else 0
+    st.markdown("Media, mediana, desviación estándar, mínimo, máximo y percentiles de cada columna numérica.")
+
+    # Las descripciones se calculan una vez por carga (ver estadisticas.py y metricas.py)
+    columnas_num = {"Vistas": "vistas", "Likes": "likes", "Comentarios": "comentarios", "Duración (s)": "duración"}
+    etiqueta = st.selectbox("Selecciona la columna", list(columnas_num.keys()))
+    desc = resumen.estadisticas[columnas_num[etiqueta]]
 
     # Mostrar resultados
-    st.write(f"**Media de vistas:** {media_v:.2f}")
-    st.write(f"**Mediana de vistas:** {mediana_v:.2f}")
-    st.write(f"**Desviación estándar de vistas:** {desv_v:.2f}")
-    st.write(f"**Mínimo de vistas:** {min_v}")
-    st.write(f"**Máximo de vistas:** {max_v}")
+    st.write(f"**Media:** {desc.media:.2f}")
+    st.write(f"**Mediana:** {desc.mediana:.2f}")
+    st.write(f"**Desviación estándar:** {desc.desviacion:.2f}")
+    st.write(f"**Mínimo:** {desc.minimo:.0f}")
+    st.write(f"**Máximo:** {desc.maximo:.0f}")
+
+    # Tabla con todas las columnas y sus percentiles
+    st.subheader("Resumen de todas las columnas")
+    def calcular_tabla_estadisticas():
+        filas = []
+        for nombre_col, columna in columnas_num.items():
+            d = resumen.estadisticas[columna]
+            fila = {"columna": nombre_col, "n": d.n, "media": round(d.media, 2), "desv. estándar": round(d.desviacion, 2)}
+            for p, v in d.percentiles.items():
+                fila["p" + str(p)] = round(v, 2)
+            fila["mínimo"] = d.minimo
+            fila["máximo"] = d.maximo
+            filas.append(fila)
+        return filas
+    st.dataframe(vista_derivada(page, (), calcular_tabla_estadisticas), use_container_width=True)
@@ -0,0 +1,147 @@
+# metricas.py
+
+"""
+Métricas derivadas y rankings sobre la TablaYT.
+
+- engagement(tabla): (likes + comentarios) / vistas por video
+- top_k(valores, k): índices de los k mayores valores usando selección parcial
+  (np.argpartition, O(n)) y ordenando solo esos k elementos (O(k log k)),
+  en vez de ordenar todo el dataset.
+- calcular_resumen(tabla): KPIs del dataset calculados una vez por carga
+  (conteos, sumas, medias, mínimos y máximos por métrica, subtotales por
+  playlist y por ayudante, y descripciones con percentiles), para que las
+  páginas solo los lean.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from agrupar import Grupos, agrupar, agrupar_por
+from estadisticas import describir
+
+# Columnas numéricas que resume calcular_resumen, en el orden de sus arreglos
+METRICAS_RESUMEN = ("vistas", "likes", "comentarios")
+
+# Columnas para las que se guarda una descripción completa (media, percentiles, ...)
+COLUMNAS_DESCRITAS = METRICAS_RESUMEN + ("duración",)
+
+# Métricas disponibles para los rankings: etiqueta en la UI -> nombre interno
+METRICAS_RANKING = {
+    "Vistas": "vistas",
+    "Likes": "likes",
+    "Comentarios": "comentarios",
+    "Engagement (likes + comentarios) / vistas": "engagement",
+}
+
+
+def engagement(tabla):
+    """Razón (likes + comentarios) / vistas por video; 0 si el video no tiene vistas."""
+    vistas = tabla["vistas"]
+    interacciones = (tabla["likes"] + tabla["comentarios"]).astype(np.float64)
+    return np.divide(interacciones, vistas, out=np.zeros(len(vistas)), where=vistas > 0)
+
+
+def valores_metrica(tabla, nombre):
+    """Devuelve el arreglo de la métrica 'nombre' (columna de la tabla o derivada)."""
+    if nombre == "engagement":
+        return engagement(tabla)
+    return tabla[nombre]
+
+
+def top_k(valores, k):
+    """
+    Índices de los k mayores 'valores', de mayor a menor.
+    Entre los k elegidos, los empates se ordenan según su posición en el CSV.
+    """
+    n = len(valores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+    if k < n:
+        candidatos = np.argpartition(-valores, k - 1)[:k]
+    else:
+        candidatos = np.arange(n)
+    # Solo se ordenan los k candidatos, por (valor desc, posición asc)
+    orden = np.lexsort((candidatos, -valores[candidatos]))
+    return candidatos[orden]
+
+
+@dataclass
+class Resumen:
+    """
+    KPIs del dataset. Los arreglos conteo/suma/media/minimo/maximo tienen una
+    posición por cada columna de 'metricas' y solo consideran celdas válidas.
+    Las descripciones con percentiles ('estadisticas') se calculan la primera vez
+    que se piden, ya que no todas las páginas las usan.
+    """
+    n_videos: int
+    metricas: tuple
+    conteo: np.ndarray
+    suma: np.ndarray
+    media: np.ndarray
+    minimo: np.ndarray
+    maximo: np.ndarray
+    por_playlist: Grupos           # subtotales de las 'metricas' por playlist
+    duracion_por_ayudante: Grupos  # segundos de video por ayudante
+    tabla: object = field(default=None, repr=False)  # para calcular 'estadisticas'
+    _estadisticas: dict = field(default=None, repr=False)
+
+    @property
+    def estadisticas(self):
+        """Diccionario columna -> estadisticas.Descripcion (ver COLUMNAS_DESCRITAS)."""
+        if self._estadisticas is None:
+            self._estadisticas = describir_columnas(self.tabla)
+        return self._estadisticas
+
+    def kpi(self, metrica, agregado):
+        """Por ejemplo: resumen.kpi("vistas", "suma")."""
+        return getattr(self, agregado)[self.metricas.index(metrica)].item()
+
+    def columna_playlist(self, metrica, agregado="suma"):
+        """Subtotal de una métrica para cada playlist, alineado con por_playlist.claves."""
+        return getattr(self.por_playlist, agregado)[:, self.metricas.index(metrica)]
+
+
+def calcular_resumen(tabla):
+    """
+    Calcula todos los KPIs de la tabla en una sola pasada vectorizada sobre la
+    matriz (n_videos x métricas). Pensado para ejecutarse una vez por carga y
+    quedar en caché junto a la tabla.
+    """
+    matriz = np.column_stack([tabla[m] for m in METRICAS_RESUMEN])
+    validas = np.column_stack([tabla.validos(m) for m in METRICAS_RESUMEN])
+
+    conteo = validas.sum(axis=0)
+    suma = np.where(validas, matriz, 0).sum(axis=0)
+    tope = np.iinfo(matriz.dtype)
+    minimo = np.where(validas, matriz, tope.max).min(axis=0, initial=tope.max)
+    maximo = np.where(validas, matriz, tope.min).max(axis=0, initial=tope.min)
+    media = suma / np.maximum(conteo, 1)
+
+    # Subtotales por playlist: solo filas con las tres métricas válidas
+    por_playlist = agrupar(
+        tabla["playlist(s)"], matriz, tabla.categorias["playlist(s)"], mascara=validas.all(axis=1)
+    )
+    duracion_por_ayudante = agrupar_por(tabla, "Ayudante", "duración", mascara=tabla.validos("duración"))
+
+    return Resumen(
+        n_videos=len(tabla),
+        metricas=METRICAS_RESUMEN,
+        conteo=conteo,
+        suma=suma,
+        media=media,
+        minimo=minimo,
+        maximo=maximo,
+        por_playlist=por_playlist,
+        duracion_por_ayudante=duracion_por_ayudante,
+        tabla=tabla,
+    )
+
+
+def describir_columnas(tabla):
+    """Descripción (media, desviación, percentiles, ...) de cada columna de COLUMNAS_DESCRITAS."""
+    estadisticas = {}
+    for columna in COLUMNAS_DESCRITAS:
+        estadisticas[columna] = describir(tabla[columna][tabla.validos(columna)])
+    return estadisticas
@@ -0,0 +1,161 @@
+# orden_externo.py
+
+"""
+Ordenamiento externo de CSV por una columna numérica, con memoria acotada.
+Lo usa pipeline_notas.py para el ranking de promedios:
+
+- Cada trozo se ordena por separado (ordenar_trozo) y se guarda en un archivo
+  temporal ("corrida"); mezclar_corridas mezcla después las corridas (merge de
+  k vías con heapq.merge) en el archivo de salida. Si hay más de
+  MAX_CORRIDAS_ABIERTAS corridas, se mezclan primero por grupos, en varias
+  pasadas, para no abrir demasiados archivos a la vez.
+- MejoresN: cuando solo interesa el comienzo del ranking, guarda las N mejores
+  filas en un heap acotado y no se escriben corridas.
+- filas_para_memoria: filas por trozo para respetar un presupuesto de memoria.
+
+En ambos casos el orden es estable: a igual valor, las filas quedan en el orden
+en que venían en el archivo. La memoria usada depende del tamaño del trozo (o
+de N), no del tamaño del archivo.
+"""
+
+import csv
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+# Presupuesto de memoria por defecto para los trozos (bytes)
+MEMORIA_MAXIMA = 256 * 1024 * 1024
+
+# Máximo de corridas que se abren a la vez en una mezcla
+MAX_CORRIDAS_ABIERTAS = 64
+
+
+def filas_para_memoria(entrada, memoria_maxima=MEMORIA_MAXIMA, muestra=1000, **opciones_lectura):
+    """
+    Filas por trozo para que un trozo (más su copia ordenada) no supere
+    'memoria_maxima' bytes, midiendo cuánto ocupa en memoria una muestra del archivo.
+    """
+    primeras = pd.read_csv(entrada, nrows=muestra, **opciones_lectura)
+    if len(primeras) == 0:
+        return muestra
+    bytes_fila = primeras.memory_usage(deep=True, index=True).sum() / len(primeras)
+    return max(1000, int(memoria_maxima // (2 * bytes_fila)))
+
+
+def _clave(valor, descendente):
+    # Clave de mezcla de una celda: menor = va antes. Las celdas vacías van al final.
+    try:
+        numero = float(valor)
+    except ValueError:
+        numero = float("nan")
+    if numero != numero:
+        return (1, 0.0)
+    return (0, -numero if descendente else numero)
+
+
+def _leer_corrida(path, posicion, descendente):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for fila in csv.reader(f):
+            yield _clave(fila[posicion], descendente), fila
+
+
+def _mezclar(paths, salida, posicion, descendente, encabezados=None):
+    with open(salida, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f, lineterminator="\n")
+        if encabezados is not None:
+            escritor.writerow(encabezados)
+        # heapq.merge es estable: a igual clave, primero las filas de las corridas anteriores
+        corridas = [_leer_corrida(p, posicion, descendente) for p in paths]
+        for _, fila in heapq.merge(*corridas, key=lambda par: par[0]):
+            escritor.writerow(fila)
+
+
+def mezclar_corridas(paths, salida, encabezados, columna, descendente=False,
+                     max_abiertas=MAX_CORRIDAS_ABIERTAS, directorio=None):
+    """
+    Mezcla corridas ya ordenadas (CSV sin encabezados, en el orden del archivo
+    original) en 'salida', con 'encabezados' como primera línea.
+    """
+    posicion = list(encabezados).index(columna)
+    paths = list(paths)
+    pasada = 0
+    while len(paths) > max_abiertas:
+        # Se mezclan grupos de corridas consecutivas: así se mantiene la estabilidad
+        siguientes = []
+        for inicio in range(0, len(paths), max_abiertas):
+            grupo = paths[inicio:inicio + max_abiertas]
+            destino = os.path.join(directorio or os.path.dirname(grupo[0]),
+                                   "pasada" + str(pasada) + "-" + str(len(siguientes)) + ".csv")
+            _mezclar(grupo, destino, posicion, descendente)
+            for path in grupo:
+                os.remove(path)
+            siguientes.append(destino)
+        paths = siguientes
+        pasada += 1
+    _mezclar(paths, salida, posicion, descendente, encabezados)
+
+
+def ordenar_trozo(trozo, columna, descendente=False):
+    """Ordena un DataFrame por 'columna' de forma estable, con los NaN al final."""
+    return trozo.sort_values(columna, ascending=not descendente, kind="stable", na_position="last")
+
+
+def candidatos(trozo, columna, n, descendente=True):
+    """
+    Posiciones (en orden) de las filas del trozo que pueden estar entre las 'n'
+    mejores según 'columna', elegidas con np.partition sin ordenar el trozo. El
+    umbral incluye todos los empates; los NaN nunca son candidatos.
+    """
+    if n <= 0:
+        return np.zeros(0, dtype=np.intp)
+    valores = trozo[columna].to_numpy(dtype=np.float64)
+    validos = np.flatnonzero(~np.isnan(valores))
+    valores = valores[validos]
+    if len(valores) > n:
+        k = len(valores) - n if descendente else n - 1
+        umbral = np.partition(valores, k)[k]
+        validos = validos[valores >= umbral if descendente else valores <= umbral]
+    return validos
+
+
+class MejoresN:
+    """
+    Las N mejores filas vistas hasta ahora según 'columna', en un heap acotado.
+    Se alimenta con trozos (DataFrames cuyo índice es el número de fila en el
+    archivo, como los que entrega pd.read_csv con chunksize). De cada trozo solo
+    entran al heap sus propios N mejores, elegidos con NumPy (np.partition), así
+    que las operaciones de heap en Python son a lo más N por trozo.
+    """
+
+    def __init__(self, n, columna, descendente=True):
+        self.n = n
+        self.columna = columna
+        self.descendente = descendente
+        self.columnas = None
+        # Elementos (clave, desempate, fila): la raíz del heap es la peor fila guardada
+        self._heap = []
+
+    def agregar(self, trozo):
+        if self.columnas is None:
+            self.columnas = list(trozo.columns)
+        if self.n <= 0 or len(trozo) == 0:
+            return
+        validos = candidatos(trozo, self.columna, self.n, self.descendente)
+        valores = trozo[self.columna].to_numpy(dtype=np.float64)[validos]
+
+        filas = trozo.iloc[validos].itertuples(index=True, name=None)
+        for valor, fila in zip(valores.tolist(), filas):
+            # Mayor clave = mejor fila; a igual valor gana la que venía antes en el archivo
+            elemento = (valor if self.descendente else -valor, -fila[0], fila[1:])
+            if len(self._heap) < self.n:
+                heapq.heappush(self._heap, elemento)
+            elif elemento > self._heap[0]:
+                heapq.heapreplace(self._heap, elemento)
+
+    def resultado(self):
+        """DataFrame con las N mejores filas, de la mejor a la peor."""
+        ordenados = sorted(self._heap, reverse=True)
+        return pd.DataFrame([fila for _, _, fila in ordenados], columns=self.columnas)
+
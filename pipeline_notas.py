@@ -0,0 +1,223 @@
+# pipeline_notas.py
+
+"""
+Versión por trozos y en varios procesos del reporte de demo_pandas.py, para
+listas de alumnos más grandes que la memoria.
+
+  1) El CSV se lee por trozos de FILAS_POR_TROZO filas con tipos angostos
+     (notas UInt8, nombres como category) en vez de int64 y texto. Las notas
+     vacías, con texto o fuera de 0 a 100 quedan como <NA> y no cuentan en el
+     promedio (un alumno sin ninguna nota válida queda sin promedio, al final).
+  2) Cada trozo se envía a un proceso del pool, que calcula el promedio, separa
+     a los alumnos con promedio >= UMBRAL_DESTACADOS y deja el trozo ordenado
+     por promedio (de mayor a menor) en un archivo temporal ("corrida").
+  3) Las corridas ordenadas se mezclan (merge de k vías, ver orden_externo.py)
+     en el CSV de salida, leyendo una línea a la vez de cada una: el
+     ordenamiento completo nunca está en memoria.
+
+Como mucho hay 2 trozos por proceso en vuelo a la vez, así que la memoria usada
+depende del tamaño del trozo y de la cantidad de procesos, no del archivo. Con
+'memoria_maxima' el tamaño del trozo se calcula para respetar ese presupuesto.
+
+Con 'top' no se ordenan los trozos ni se escriben corridas: cada proceso
+devuelve solo los candidatos a los 'top' mejores de su trozo (elegidos con
+np.partition) y se guardan en un heap acotado (orden_externo.MejoresN).
+"""
+
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from formato_columnar import csv_a_columnar, escribir_tabla, formato_de
+from orden_externo import MejoresN, candidatos, filas_para_memoria, mezclar_corridas, ordenar_trozo
+
+# Columnas de notas y sus tipos angostos (las notas van de 0 a 100: caben en UInt8,
+# que además admite <NA> para las celdas vacías o inválidas)
+COLUMNAS_NOTAS = ["pep1", "pep2", "control1", "control2"]
+TIPOS_COLUMNAS = {"nombre": "category", "pep1": "UInt8", "pep2": "UInt8", "control1": "UInt8", "control2": "UInt8"}
+TIPOS_SALIDA = dict(TIPOS_COLUMNAS, promedio="float32")
+
+# Al leer, las notas llegan como texto y se convierten después (ver convertir_notas):
+# con UInt8 directo, read_csv fallaría con una celda como "abc"
+TIPOS_LECTURA = dict(TIPOS_COLUMNAS, **dict.fromkeys(COLUMNAS_NOTAS, "str"))
+
+FILAS_POR_TROZO = 200_000
+UMBRAL_DESTACADOS = 85
+
+
+def convertir_notas(trozo):
+    """Pasa las notas del trozo a UInt8; las celdas vacías, con texto o fuera de 0 a 100 quedan en <NA>."""
+    for columna in COLUMNAS_NOTAS:
+        numeros = pd.to_numeric(trozo[columna], errors="coerce")
+        validas = (numeros >= 0) & (numeros <= 100) & (numeros % 1 == 0)
+        trozo[columna] = numeros.where(validas).astype("UInt8")
+    return trozo
+
+
+def leer_trozos(path_csv, filas_por_trozo=FILAS_POR_TROZO):
+    """Generador de DataFrames de a 'filas_por_trozo' filas, con los tipos de TIPOS_COLUMNAS."""
+    for trozo in pd.read_csv(
+        path_csv, dtype=TIPOS_LECTURA, skipinitialspace=True, encoding="utf-8", chunksize=filas_por_trozo
+    ):
+        yield convertir_notas(trozo)
+
+
+def agregar_promedio(trozo):
+    """Agrega la columna 'promedio' (float32, NaN si no hay notas válidas) al trozo y lo devuelve."""
+    trozo["promedio"] = trozo[COLUMNAS_NOTAS].mean(axis=1).astype("float32")
+    return trozo
+
+
+def con_tipos_salida(df):
+    """'df' con los tipos de TIPOS_SALIDA en las columnas que tenga."""
+    return df.astype({c: t for c, t in TIPOS_SALIDA.items() if c in df.columns})
+
+
+def compactar(df, nombres="auto"):
+    """
+    Copia de 'df' con el tipo más angosto que guarda todos sus valores:
+    - enteros: el entero más chico que los contiene (uint8 para notas de 0 a 100)
+    - decimales: float32 (por ejemplo 'promedio')
+    - texto: category si hay muchos repetidos (menos de la mitad son distintos),
+      si no, texto de Arrow. Con nombres="category" o nombres="arrow" se fuerza uno.
+    """
+    compacto = df.copy()
+    for columna in compacto.columns:
+        serie = compacto[columna]
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+        if pd.api.types.is_integer_dtype(serie):
+            signo = "unsigned" if len(serie) == 0 or serie.min() >= 0 else "integer"
+            compacto[columna] = pd.to_numeric(serie, downcast=signo)
+        elif pd.api.types.is_float_dtype(serie):
+            compacto[columna] = pd.to_numeric(serie, downcast="float")
+        elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            repetidos = serie.nunique() <= len(serie) // 2
+            if nombres == "category" or (nombres == "auto" and repetidos):
+                compacto[columna] = serie.astype("category")
+            else:
+                compacto[columna] = serie.astype("string[pyarrow]")
+    return compacto
+
+
+def reporte_memoria(antes, despues):
+    """
+    DataFrame con el tipo y los bytes de cada columna antes y después de
+    compactar, más una fila "TOTAL" (los bytes incluyen el texto: deep=True).
+    """
+    bytes_antes = antes.memory_usage(deep=True, index=False)
+    bytes_despues = despues.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({
+        "tipo antes": antes.dtypes.astype(str),
+        "bytes antes": bytes_antes,
+        "tipo después": despues.dtypes.astype(str),
+        "bytes después": bytes_despues,
+    })
+    reporte.loc["TOTAL"] = ["", bytes_antes.sum(), "", bytes_despues.sum()]
+    reporte["reducción"] = (reporte["bytes antes"] / reporte["bytes después"]).round(1).astype(str) + "x"
+    return reporte
+
+
+def procesar_trozo(trozo, path_corrida, umbral=UMBRAL_DESTACADOS, top=None):
+    """
+    Trabajo de cada proceso: calcula el promedio, escribe el trozo ordenado por
+    promedio descendente en 'path_corrida' y devuelve (filas, filas con promedio,
+    suma de promedios, destacados, mejores), donde destacados es el sub-DataFrame
+    con promedio >= umbral.
+    Con 'top' no ordena ni escribe la corrida: 'mejores' son las filas candidatas
+    a estar entre las 'top' mejores (sin ordenar, con su número de fila en el
+    índice), que MejoresN termina de elegir; si no, 'mejores' es None.
+    """
+    trozo = agregar_promedio(trozo)
+    mejores = None
+    if top is None:
+        ordenar_trozo(trozo, "promedio", descendente=True).to_csv(path_corrida, index=False, header=False)
+    else:
+        mejores = trozo.iloc[candidatos(trozo, "promedio", top)]
+    destacados = trozo[trozo["promedio"] >= umbral]
+    promedios = trozo["promedio"].to_numpy()
+    con_promedio = int((~np.isnan(promedios)).sum())
+    return len(trozo), con_promedio, float(np.nansum(promedios, dtype="float64")), destacados, mejores
+
+
+def reporte_por_trozos(path_csv, salida_ordenado, salida_destacados, procesos=None,
+                       filas_por_trozo=FILAS_POR_TROZO, umbral=UMBRAL_DESTACADOS,
+                       memoria_maxima=None, top=None):
+    """
+    Ejecuta el reporte completo sin cargar el archivo en memoria y devuelve
+    (cantidad de alumnos, promedio general, cantidad de destacados). El promedio
+    general es el de los alumnos que tienen al menos una nota válida.
+    - memoria_maxima: presupuesto en bytes para los trozos en vuelo (reemplaza a 'filas_por_trozo')
+    - top           : si se indica, 'salida_ordenado' tiene solo los 'top' mejores promedios
+    Si 'salida_ordenado' termina en .parquet o .arrow se guarda en ese formato
+    (ver formato_columnar.py); la mezcla se hace igual en CSV y luego se convierte.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if memoria_maxima is not None:
+        # Hay hasta 2 trozos por proceso en vuelo: el presupuesto se reparte entre ellos
+        filas_por_trozo = filas_para_memoria(
+            path_csv, memoria_maxima // (2 * procesos), dtype=TIPOS_LECTURA, skipinitialspace=True
+        )
+    directorio = tempfile.mkdtemp(prefix="corridas-")
+    corridas = []
+    filas = 0
+    con_promedio = 0
+    suma = 0.0
+    n_destacados = 0
+    encabezados = None
+    mejores = MejoresN(top, "promedio") if top is not None else None
+    try:
+        with ProcessPoolExecutor(procesos) as pool, \
+                open(salida_destacados, "w", encoding="utf-8", newline="") as f_destacados:
+            pendientes = deque()
+
+            def recibir(futuro):
+                # Los resultados se recogen en el orden de los trozos
+                nonlocal filas, con_promedio, suma, n_destacados
+                n, n_promedio, s, destacados, mejores_trozo = futuro.result()
+                filas += n
+                con_promedio += n_promedio
+                suma += s
+                n_destacados += len(destacados)
+                destacados[["nombre", "promedio"]].to_csv(
+                    f_destacados, index=False, header=f_destacados.tell() == 0
+                )
+                if mejores is not None:
+                    mejores.agregar(mejores_trozo)
+
+            for indice, trozo in enumerate(leer_trozos(path_csv, filas_por_trozo)):
+                if encabezados is None:
+                    encabezados = list(trozo.columns) + ["promedio"]
+                path_corrida = None
+                if top is None:
+                    path_corrida = os.path.join(directorio, "corrida" + str(indice) + ".csv")
+                    corridas.append(path_corrida)
+                pendientes.append(pool.submit(procesar_trozo, trozo, path_corrida, umbral, top))
+                # No se leen más trozos mientras haya 2 por proceso sin terminar
+                while len(pendientes) >= 2 * procesos:
+                    recibir(pendientes.popleft())
+            while pendientes:
+                recibir(pendientes.popleft())
+
+        if encabezados is None:
+            # Entrada sin filas: una tabla vacía con los encabezados, en el formato pedido
+            encabezados = list(pd.read_csv(path_csv, nrows=0).columns) + ["promedio"]
+            escribir_tabla(con_tipos_salida(pd.DataFrame(columns=encabezados)), salida_ordenado)
+        elif mejores is not None:
+            escribir_tabla(con_tipos_salida(mejores.resultado()), salida_ordenado)
+        else:
+            columnar = formato_de(salida_ordenado) != "csv"
+            mezcla = os.path.join(directorio, "ordenado.csv") if columnar else salida_ordenado
+            mezclar_corridas(corridas, mezcla, encabezados, "promedio",
+                             descendente=True, directorio=directorio)
+            if columnar:
+                csv_a_columnar(mezcla, salida_ordenado, dtype=TIPOS_SALIDA)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return filas, (suma / con_promedio if con_promedio else 0.0), n_destacados
@@ -0,0 +1,198 @@
+# snapshot.py
+
+"""
+Snapshot binario y columnar del dataset YT-STATS en disco.
+
+La primera vez que se carga un CSV, la TablaYT ya convertida se guarda como un
+directorio de archivos .npy (uno por columna; las columnas de texto como bytes
+UTF-8 + offsets) y un metadata.json. Las cargas siguientes, incluso desde otros
+procesos del servidor, abren esos .npy con mmap: no se vuelve a parsear el CSV
+y las páginas de memoria se comparten entre procesos a través del sistema operativo.
+
+El snapshot se reconstruye solo si el CSV cambió: primero se compara la fecha
+de modificación y el tamaño; si la fecha cambió pero el contenido (hash SHA-1)
+es el mismo, se reutiliza el snapshot y solo se actualiza la fecha guardada.
+
+Estructura en disco (por defecto <directorio> es .cache_yt junto al CSV):
+    <directorio>/<nombre del csv>/actual.json          -> apunta al snapshot vigente
+    <directorio>/<nombre del csv>/v<formato>-<hash>/... -> columnas .npy + metadata.json
+La versión del formato va en el nombre de la carpeta: al cambiar VERSION_FORMATO
+los snapshots viejos no se reutilizan, se reconstruyen.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from datos_yt import ColumnaTexto, TablaYT, cargar_tabla
+
+# Nombre del directorio de snapshots, que se crea junto al CSV (ver directorio_snapshots)
+DIRECTORIO_SNAPSHOTS = ".cache_yt"
+
+# Se incrementa si cambia el formato en disco o cómo se convierten las columnas
+# (por ejemplo, qué duraciones se aceptan), para invalidar snapshots viejos
+VERSION_FORMATO = 2
+
+
+def firma_archivo(path):
+    """(fecha de modificación en ns, tamaño en bytes): barata de obtener con os.stat."""
+    info = os.stat(path)
+    return info.st_mtime_ns, info.st_size
+
+
+def hash_archivo(path, tamano_bloque=1 << 20):
+    """SHA-1 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        bloque = f.read(tamano_bloque)
+        while bloque:
+            h.update(bloque)
+            bloque = f.read(tamano_bloque)
+    return h.hexdigest()
+
+
+def directorio_snapshots(path_csv):
+    """Directorio de snapshots por defecto: DIRECTORIO_SNAPSHOTS en la carpeta del CSV
+    (no depende del directorio desde el que se ejecute la app)."""
+    return os.path.join(os.path.dirname(os.path.abspath(path_csv)), DIRECTORIO_SNAPSHOTS)
+
+
+def _nombre_snapshot(contenido):
+    # Carpeta de un snapshot: versión del formato + hash del CSV
+    return "v" + str(VERSION_FORMATO) + "-" + contenido
+
+
+def _nombre_archivo(columna):
+    # Los nombres de columnas traen tildes y paréntesis: usamos su posición
+    return "col" + str(columna)
+
+
+def guardar_snapshot(tabla, directorio):
+    """Escribe la tabla en 'directorio' (que no debe existir) como archivos .npy."""
+    os.makedirs(directorio)
+    tipos = {}
+    for i, nombre in enumerate(tabla.encabezados):
+        columna = tabla.columnas[nombre]
+        base = os.path.join(directorio, _nombre_archivo(i))
+        if isinstance(columna, np.ndarray) and columna.dtype != object:
+            np.save(base + ".npy", columna)
+            tipos[nombre] = "arreglo"
+        else:
+            if not isinstance(columna, ColumnaTexto):
+                columna = ColumnaTexto.desde_textos(columna)
+            np.save(base + ".datos.npy", columna.datos)
+            np.save(base + ".offsets.npy", columna.offsets)
+            tipos[nombre] = "texto"
+
+    metadata = {
+        "version": VERSION_FORMATO,
+        "encabezados": tabla.encabezados,
+        "tipos": tipos,
+        "categorias": tabla.categorias,
+    }
+    errores = {}
+    for nombre, filas in tabla.errores.items():
+        errores[nombre] = np.asarray(filas).tolist()
+    metadata["errores"] = errores
+    with open(os.path.join(directorio, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+
+def abrir_snapshot(directorio):
+    """Abre un snapshot con mmap (solo lectura) y devuelve la TablaYT."""
+    with open(os.path.join(directorio, "metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    if metadata.get("version") != VERSION_FORMATO:
+        raise ValueError("Snapshot con formato antiguo: " + directorio)
+
+    columnas = {}
+    for i, nombre in enumerate(metadata["encabezados"]):
+        base = os.path.join(directorio, _nombre_archivo(i))
+        if metadata["tipos"][nombre] == "arreglo":
+            columnas[nombre] = np.load(base + ".npy", mmap_mode="r")
+        else:
+            columnas[nombre] = ColumnaTexto(
+                np.load(base + ".datos.npy", mmap_mode="r"),
+                np.load(base + ".offsets.npy", mmap_mode="r"),
+            )
+    errores = {}
+    for nombre, filas in metadata["errores"].items():
+        errores[nombre] = np.array(filas, dtype=np.intp)
+    return TablaYT(metadata["encabezados"], columnas, metadata["categorias"], errores)
+
+
+def _leer_puntero(path_puntero):
+    try:
+        with open(path_puntero, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_puntero(path_puntero, puntero):
+    # Escritura atómica: otro proceso nunca ve un actual.json a medio escribir
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(path_puntero), suffix=".json")
+    with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+        json.dump(puntero, f)
+    os.replace(temporal, path_puntero)
+
+
+def cargar_con_snapshot(path_csv, directorio=None):
+    """
+    Devuelve la TablaYT del CSV abriendo su snapshot con mmap. Si no hay
+    snapshot o el CSV cambió, lo parsea una vez y guarda un snapshot nuevo.
+    'directorio' es por defecto directorio_snapshots(path_csv).
+    """
+    directorio = directorio or directorio_snapshots(path_csv)
+    carpeta = os.path.join(directorio, os.path.basename(path_csv))
+    os.makedirs(carpeta, exist_ok=True)
+    path_puntero = os.path.join(carpeta, "actual.json")
+
+    mtime, tamano = firma_archivo(path_csv)
+    puntero = _leer_puntero(path_puntero)
+    if puntero and puntero.get("version") == VERSION_FORMATO:
+        vigente = os.path.join(carpeta, _nombre_snapshot(puntero["hash"]))
+        if (puntero["mtime"], puntero["tamano"]) == (mtime, tamano) and os.path.isdir(vigente):
+            return abrir_snapshot(vigente)
+        # La fecha cambió (por ejemplo, el archivo se copió): comparamos el contenido
+        contenido = hash_archivo(path_csv)
+        if contenido == puntero["hash"] and os.path.isdir(vigente):
+            _escribir_puntero(path_puntero, dict(puntero, mtime=mtime, tamano=tamano))
+            return abrir_snapshot(vigente)
+    else:
+        contenido = hash_archivo(path_csv)
+
+    # Hay que reconstruir: se escribe en un directorio temporal y se renombra, de
+    # modo que otro proceso que lea al mismo tiempo nunca vea un snapshot incompleto
+    destino = os.path.join(carpeta, _nombre_snapshot(contenido))
+    if not os.path.isdir(destino):
+        temporal = tempfile.mkdtemp(dir=carpeta, prefix=".tmp-")
+        try:
+            guardar_snapshot(cargar_tabla(path_csv), os.path.join(temporal, "snapshot"))
+            try:
+                os.rename(os.path.join(temporal, "snapshot"), destino)
+            except OSError:
+                # Otro proceso terminó primero el mismo snapshot: usamos el suyo
+                if not os.path.isdir(destino):
+                    raise
+        finally:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    _escribir_puntero(path_puntero, {
+        "version": VERSION_FORMATO, "hash": contenido, "mtime": mtime, "tamano": tamano,
+    })
+    _borrar_snapshots_viejos(carpeta, _nombre_snapshot(contenido))
+    return abrir_snapshot(destino)
+
+
+def _borrar_snapshots_viejos(carpeta, vigente):
+    """Elimina snapshots de versiones anteriores del CSV (si algún proceso aún los
+    tiene abiertos con mmap, el sistema operativo mantiene los datos hasta que los cierre)."""
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        if nombre != vigente and not nombre.startswith(".") and os.path.isdir(ruta):
+            shutil.rmtree(ruta, ignore_errors=True)